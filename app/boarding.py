@@ -0,0 +1,148 @@
+import threading
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from . import models, notify, tickets
+from .catalogue import catalogue
+
+NOTIFY_CHANNEL = "boarding"
+
+class BoardingPass(NamedTuple):
+    booking_id: int
+    status: str
+    seats: tuple
+
+class Manifest(NamedTuple):
+    schedule_id: int
+    departure: datetime
+    passes: dict  # booking id -> BoardingPass
+
+def _departure(schedule) -> datetime:
+    return datetime.combine(schedule.travel_date, schedule.departure_time)
+
+class BoardingIndex:
+    # per-departure booking manifests, so scanning tickets at the door needs no database round trip
+    def __init__(self):
+        self._manifests = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, db: Session, schedule_id: int):
+        schedule = catalogue.schedule(db, schedule_id)
+        if schedule is None:
+            return None
+        rows = (
+            db.query(models.Booking.id, models.Booking.booking_status,
+                     func.coalesce(models.BookingSeat.seat_number, models.Seat.seat_number))
+            .outerjoin(models.BookingSeat, models.BookingSeat.booking_id == models.Booking.id)
+            .outerjoin(models.Seat, models.BookingSeat.seat_id == models.Seat.id)
+            .filter(models.Booking.schedule_id == schedule_id)
+            .all()
+        )
+        seats, statuses = {}, {}
+        for booking_id, status, seat_number in rows:
+            statuses[booking_id] = status
+            if seat_number is not None:
+                seats.setdefault(booking_id, []).append(seat_number)
+        passes = {
+            booking_id: BoardingPass(booking_id, status, tuple(sorted(seats.get(booking_id, ()))))
+            for booking_id, status in statuses.items()
+        }
+        manifest = Manifest(schedule_id, _departure(schedule), passes)
+        with self._lock:
+            self._manifests[schedule_id] = manifest
+        return manifest
+
+    def manifest(self, db: Session, schedule_id: int):
+        manifest = self._manifests.get(schedule_id)
+        if manifest is not None:
+            self.hits += 1
+            return manifest
+        self.misses += 1
+        return self.load(db, schedule_id)
+
+    def preload(self, db: Session, minutes: int):
+        # loads departures due within the window and drops those that left longer ago than that
+        now = datetime.now()
+        window = timedelta(minutes=minutes)
+        with self._lock:
+            for schedule_id in [s for s, m in self._manifests.items() if m.departure < now - window]:
+                del self._manifests[schedule_id]
+        due = db.query(models.Schedule.id, models.Schedule.travel_date, models.Schedule.departure_time).filter(
+            models.Schedule.travel_date.in_({now.date(), (now + window).date()})
+        ).all()
+        loaded = 0
+        for row in due:
+            if row.id not in self._manifests and now <= _departure(row) <= now + window:
+                self.load(db, row.id)
+                loaded += 1
+        return loaded
+
+    def verify(self, db: Session, scanned, schedule_id: int = None):
+        # scanned tickets in order; a booking already seen in the same batch is reported, not boarded twice
+        manifests, reloaded, seen, results = {}, set(), set(), []
+        for ticket in scanned:
+            result = {"ticket": ticket, "valid": False}
+            results.append(result)
+            try:
+                booking_id, ticket_schedule = tickets.parse(ticket)
+            except ValueError as e:
+                result["reason"] = str(e)
+                continue
+            result.update(booking_id=booking_id, schedule_id=ticket_schedule)
+            if schedule_id is not None and ticket_schedule != schedule_id:
+                result["reason"] = "Ticket is for another departure"
+                continue
+            if ticket_schedule not in manifests:
+                manifests[ticket_schedule] = self.manifest(db, ticket_schedule)
+            manifest = manifests[ticket_schedule]
+            boarding_pass = manifest.passes.get(booking_id) if manifest else None
+            if boarding_pass is None and manifest is not None and ticket_schedule not in reloaded:
+                # the signature is ours, so the booking was made after the manifest was loaded
+                manifest = manifests[ticket_schedule] = self.load(db, ticket_schedule)
+                reloaded.add(ticket_schedule)
+                boarding_pass = manifest.passes.get(booking_id) if manifest else None
+            if boarding_pass is None:
+                result["reason"] = "Booking not found"
+                continue
+            result.update(status=boarding_pass.status, seats=list(boarding_pass.seats))
+            if boarding_pass.status == "CANCELLED":
+                result["reason"] = "Booking is cancelled"
+            elif booking_id in seen:
+                result["reason"] = "Ticket already scanned"
+            else:
+                result["valid"] = True
+            seen.add(booking_id)
+        return results
+
+    def invalidate(self, schedule_id: int):
+        with self._lock:
+            self._manifests.pop(schedule_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._manifests.clear()
+
+    def stats(self):
+        return {"manifests": len(self._manifests), "hits": self.hits, "misses": self.misses}
+
+index = BoardingIndex()
+
+def _on_notify(payload):
+    if payload is None:
+        index.clear()
+        return
+    index.invalidate(int(payload))
+
+notify.register(NOTIFY_CHANNEL, _on_notify)
+
+def changed(db: Session, schedule_ids):
+    # call after committing a booking status change; new bookings are picked up on the first unknown scan
+    for schedule_id in schedule_ids:
+        index.invalidate(schedule_id)
+    if notify.listening() and schedule_ids:
+        for schedule_id in schedule_ids:
+            notify.send(db, NOTIFY_CHANNEL, str(schedule_id))
+        db.commit()
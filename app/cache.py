@@ -0,0 +1,46 @@
+import threading
+import time
+from .config import settings
+
+class TTLCache:
+    # small thread-safe in-process cache; entries expire after ttl seconds
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                # drop the entry closest to expiry
+                del self._data[min(self._data, key=lambda k: self._data[k][0])]
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, match):
+        with self._lock:
+            for key in [k for k in self._data if match(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+# (source, destination, travel_date) -> search results
+search_cache = TTLCache(settings.SEARCH_CACHE_TTL)
+
+def invalidate_search_date(travel_date):
+    search_cache.invalidate(lambda key: key[2] == travel_date)
@@ -0,0 +1,106 @@
+import threading
+from datetime import date, timedelta
+from typing import NamedTuple
+from sqlalchemy.orm import Session
+from . import models, notify
+
+NOTIFY_CHANNEL = "catalogue"
+
+# tuple-based records: immutable, small, and safe to share between requests
+class BusRecord(NamedTuple):
+    id: int
+    bus_number: str
+    operator_name: str
+    bus_type: str
+    source_stop: str
+    destination_stop: str
+    total_seats: int
+
+class ScheduleRecord(NamedTuple):
+    id: int
+    bus_id: int
+    travel_date: date
+    departure_time: object
+    arrival_time: object
+    fare: float
+    status: str
+
+BUS_COLUMNS = [getattr(models.Bus, f) for f in BusRecord._fields]
+SCHEDULE_COLUMNS = [getattr(models.Schedule, f) for f in ScheduleRecord._fields]
+
+class Catalogue:
+    # read-through cache of buses and schedules; seat inventory is never cached here
+    def __init__(self):
+        self._buses = {}
+        self._schedules = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, db: Session, days: int):
+        buses = {r.id: BusRecord(*r) for r in db.query(*BUS_COLUMNS)}
+        today = date.today()
+        schedules = {
+            r.id: ScheduleRecord(*r) for r in db.query(*SCHEDULE_COLUMNS).filter(
+                models.Schedule.travel_date >= today, models.Schedule.travel_date <= today + timedelta(days=days)
+            )
+        }
+        with self._lock:
+            self._buses, self._schedules = buses, schedules
+        return len(buses), len(schedules)
+
+    def _get(self, db: Session, store, key, load):
+        record = store.get(key)
+        if record is not None:
+            self.hits += 1
+            return record
+        self.misses += 1
+        record = load()
+        # a lagging replica could hand back a record that was just invalidated, so only the primary fills the cache
+        if record is not None and not db.info.get("replica"):
+            with self._lock:
+                store[key] = record
+        return record
+
+    def bus(self, db: Session, bus_id: int):
+        def load():
+            row = db.query(*BUS_COLUMNS).filter(models.Bus.id == bus_id).first()
+            return BusRecord(*row) if row else None
+        return self._get(db, self._buses, bus_id, load)
+
+    def schedule(self, db: Session, schedule_id: int):
+        def load():
+            row = db.query(*SCHEDULE_COLUMNS).filter(models.Schedule.id == schedule_id).first()
+            return ScheduleRecord(*row) if row else None
+        return self._get(db, self._schedules, schedule_id, load)
+
+    def invalidate(self, kind: str, record_id: int):
+        with self._lock:
+            (self._buses if kind == "bus" else self._schedules).pop(record_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._buses.clear()
+            self._schedules.clear()
+
+    def stats(self):
+        return {"buses": len(self._buses), "schedules": len(self._schedules), "hits": self.hits, "misses": self.misses}
+
+catalogue = Catalogue()
+
+def _on_notify(payload):
+    if payload is None:
+        # listener reconnected; anything could have changed meanwhile
+        catalogue.clear()
+        return
+    kind, _, record_id = payload.partition(":")
+    catalogue.invalidate(kind, int(record_id))
+
+notify.register(NOTIFY_CHANNEL, _on_notify)
+
+def changed(db: Session, kind: str, record_id: int):
+    # call after committing a bus/schedule write: drop our copy and tell the other workers
+    catalogue.invalidate(kind, record_id)
+    if notify.listening():
+        notify.send(db, NOTIFY_CHANNEL, f"{kind}:{record_id}")
+        db.commit()
@@ -1,11 +1,62 @@
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
-    DB_HOST: str
+    # full SQLAlchemy URL; wins over the DB_* parts when set
+    DATABASE_URL: Optional[str] = None
+    DB_HOST: Optional[str] = None
     DB_PORT: int = 5432
-    DB_USER: str
-    DB_PASSWORD: str
-    DB_NAME: str
+    DB_USER: Optional[str] = None
+    DB_PASSWORD: Optional[str] = None
+    DB_NAME: Optional[str] = None
+    # used when neither DATABASE_URL nor DB_HOST is configured (tests, local runs)
+    SQLITE_FALLBACK_URL: str = "sqlite:///./locotranz.db"
+    DB_ECHO: bool = False
+    # sync requests keep their connection until the response is serialized on the threadpool,
+    # so size + overflow should stay above the 40 anyio worker threads
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 30
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    # Postgres statement_timeout per connection, 0 disables
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # comma-separated read replica URLs; GET requests read from a healthy replica, everything else the primary
+    DB_REPLICA_URLS: str = ""
+    # replicas are probed this often and skipped while unreachable or lagging more than the max
+    DB_REPLICA_CHECK_SECONDS: int = 5
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    # after a successful write a client reads from the primary for this long (cookie based)
+    READ_YOUR_WRITES_SECONDS: int = 10
+    # serve search, available seats and booking creation from async handlers (asyncpg / aiosqlite)
+    DB_ASYNC: bool = False
+    # "rows" creates one Seat row per seat, "map" keeps a compact seat map on the schedule
+    SEAT_INVENTORY: str = "rows"
+    # seconds a /schedules/search result is served from memory (0 disables)
+    SEARCH_CACHE_TTL: int = 30
+    # seat holds taken at checkout expire after this many minutes; sweeper runs every N seconds
+    SEAT_HOLD_MINUTES: int = 10
+    SEAT_HOLD_SWEEP_SECONDS: int = 30
+    # stored responses for Idempotency-Key retries on POST /bookings/ and /payments/
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    IDEMPOTENCY_LRU_SIZE: int = 10000
+    # a key reserved by a request that never finished (e.g. a crashed worker) can be claimed again after this
+    IDEMPOTENCY_LEASE_SECONDS: int = 60
+    # statements slower than this are logged with their route (0 disables)
+    SLOW_QUERY_MS: int = 200
+    # comment line sent on idle seat availability streams
+    SEAT_STREAM_HEARTBEAT_SECONDS: int = 15
+    # upcoming days of schedules loaded into the in-process catalogue at startup
+    CATALOGUE_PRELOAD_DAYS: int = 30
+    # run "alembic upgrade head" at startup instead of as a deploy step (local development)
+    DB_AUTO_MIGRATE: bool = False
+    # HMAC key for ticket QR payloads; set per deployment, rotating it invalidates issued tickets
+    TICKET_SIGNING_KEY: str = "locotranz-dev-ticket-key"
+    # rendered ticket PNGs kept in memory; TICKET_CACHE_DIR adds a disk cache shared by workers
+    TICKET_CACHE_SIZE: int = 2048
+    TICKET_CACHE_DIR: Optional[str] = None
+    # boarding manifests are loaded into memory this long before departure and dropped this long after
+    BOARDING_PRELOAD_MINUTES: int = 60
     # Feature flag to enable Claude Haiku 4.5 for all clients
     CLAUDE_HAIKU_ENABLED: bool = True
     CLAUDE_HAIKU_VERSION: str = "4.5"
@@ -13,4 +64,29 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
 
+    @property
+    def database_url(self) -> str:
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
+        if self.DB_HOST:
+            return (f"postgresql+psycopg2://{self.DB_USER}:{self.DB_PASSWORD}"
+                    f"@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}")
+        return self.SQLITE_FALLBACK_URL
+
+    @property
+    def async_database_url(self) -> str:
+        return async_url(self.database_url)
+
+    @property
+    def replica_urls(self) -> List[str]:
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+
+def async_url(url: str) -> str:
+    for sync_prefix, async_prefix in (("postgresql+psycopg2://", "postgresql+asyncpg://"),
+                                      ("postgresql://", "postgresql+asyncpg://"),
+                                      ("sqlite://", "sqlite+aiosqlite://")):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
 settings = Settings()
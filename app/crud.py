@@ -1,7 +1,17 @@
-from sqlalchemy.orm import Session
-from . import models, schemas
-from datetime import datetime
-import base64
+from sqlalchemy import update, insert, delete, exists, select, func
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from . import models, schemas, catalogue, tickets, boarding
+from .seat_stream import stage as stage_seat_event
+from .cache import search_cache, invalidate_search_date
+from .pagination import paginate
+from datetime import datetime, timedelta
+from itertools import groupby
+from collections import Counter
+import logging
+import secrets
+
+logger = logging.getLogger(__name__)
 
 # --- Users ---
 def create_user(db: Session, user: schemas.UserCreate):
@@ -9,8 +19,8 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.add(db_user); db.commit(); db.refresh(db_user)
     return db_user
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: str = None):
+    return paginate(db.query(models.User), models.User.id, skip, limit, cursor)
 
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter_by(id=user_id).first()
@@ -40,8 +50,14 @@ def create_bus(db: Session, bus: schemas.BusCreate):
     db.add(db_bus); db.commit(); db.refresh(db_bus)
     return db_bus
 
-def get_buses(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Bus).offset(skip).limit(limit).all()
+def get_buses(db: Session, skip: int = 0, limit: int = 100, cursor: str = None,
+              source: str = None, destination: str = None):
+    q = db.query(models.Bus)
+    if source:
+        q = q.filter(models.Bus.source_stop == source)
+    if destination:
+        q = q.filter(models.Bus.destination_stop == destination)
+    return paginate(q, models.Bus.id, skip, limit, cursor)
 
 def get_bus(db: Session, bus_id: int):
     return db.query(models.Bus).filter_by(id=bus_id).first()
@@ -52,13 +68,20 @@ def update_bus(db: Session, bus_id: int, bus: schemas.BusCreate):
         return None
     for key, value in bus.model_dump().items():
         setattr(db_bus, key, value)
+    # route and capacity feed the dashboard summary of every day this bus runs
+    db.execute(update(models.Schedule).where(models.Schedule.bus_id == bus_id).values(stats_dirty=True)
+               .execution_options(synchronize_session=False))
     db.commit(); db.refresh(db_bus)
+    search_cache.clear()  # route may have changed
+    catalogue.changed(db, "bus", bus_id)
     return db_bus
 
 def delete_bus(db: Session, bus_id: int):
     db_bus = db.query(models.Bus).filter_by(id=bus_id).first()
     if db_bus:
         db.delete(db_bus); db.commit()
+        search_cache.clear()
+        catalogue.changed(db, "bus", bus_id)
         return True
     return False
 
@@ -66,52 +89,402 @@ def delete_bus(db: Session, bus_id: int):
 def create_schedule(db: Session, schedule: schemas.ScheduleCreate):
     db_s = models.Schedule(**schedule.model_dump())
     db.add(db_s); db.commit(); db.refresh(db_s)
+    invalidate_search_date(db_s.travel_date)
     return db_s
 
-def get_schedules(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Schedule).offset(skip).limit(limit).all()
+SCHEDULE_IMPORT_BATCH = 1000
+
+def expand_schedule_rule(rule: schemas.ScheduleRule):
+    # rule is already validated, so skip re-validating every generated trip
+    if rule.end_date < rule.start_date:
+        raise ValueError("end_date is before start_date")
+    if any(d < 0 or d > 6 for d in rule.days_of_week):
+        raise ValueError("days_of_week must be between 0 (Monday) and 6 (Sunday)")
+    days = set(rule.days_of_week)
+    d = rule.start_date
+    while d <= rule.end_date:
+        if d.weekday() in days:
+            yield schemas.ScheduleCreate.model_construct(
+                bus_id=rule.bus_id, travel_date=d, departure_time=rule.departure_time,
+                arrival_time=rule.arrival_time, fare=rule.fare, status=rule.status
+            )
+        d += timedelta(days=1)
+
+def _insert_schedule_batch(db: Session, batch, bus_seats, generate_seats: bool, use_map: bool):
+    rows = []
+    for _, item in batch:
+        row = item.model_dump()
+        if generate_seats and use_map:
+            row["seat_map"] = SEAT_FREE * bus_seats[item.bus_id]
+        rows.append(row)
+    created = db.execute(insert(models.Schedule).returning(models.Schedule.id, models.Schedule.bus_id), rows).all()
+    if generate_seats and not use_map:
+        db.execute(insert(models.Seat), [r for sid, bus_id in created for r in _seat_rows(sid, bus_seats[bus_id])])
+    db.commit()
+    return len(created)
+
+def import_schedules(db: Session, rows, generate_seats: bool = False, use_map: bool = False):
+    # rows: iterable of (row_number, ScheduleCreate or error message)
+    bus_seats = dict(db.query(models.Bus.id, models.Bus.total_seats).all())
+    created = 0
+    errors = {}
+    batch = []
+
+    def flush():
+        try:
+            return _insert_schedule_batch(db, batch, bus_seats, generate_seats, use_map)
+        except SQLAlchemyError as e:
+            db.rollback()
+            for row_no, _ in batch:
+                errors.setdefault(row_no, f"Insert failed: {e.__class__.__name__}")
+            return 0
+
+    for row_no, item in rows:
+        if isinstance(item, str):
+            errors.setdefault(row_no, item)
+        elif item.bus_id not in bus_seats:
+            errors.setdefault(row_no, f"Bus {item.bus_id} not found")
+        else:
+            batch.append((row_no, item))
+            if len(batch) >= SCHEDULE_IMPORT_BATCH:
+                created += flush(); batch = []
+    if batch:
+        created += flush()
+    search_cache.clear()
+    return created, [{"row": r, "error": e} for r, e in sorted(errors.items())]
+
+# column order matches ScheduleResponse, for list endpoints that serialize rows directly
+SCHEDULE_ROW_COLUMNS = (
+    models.Schedule.bus_id, models.Schedule.travel_date, models.Schedule.departure_time,
+    models.Schedule.arrival_time, models.Schedule.fare, models.Schedule.status, models.Schedule.id,
+)
+
+def get_schedules(db: Session, skip: int = 0, limit: int = 100, cursor: str = None,
+                  bus_id: int = None, status: str = None, from_date=None, to_date=None, rows: bool = False):
+    # rows=True returns plain dicts instead of ORM objects
+    q = db.query(*SCHEDULE_ROW_COLUMNS) if rows else db.query(models.Schedule)
+    if bus_id is not None:
+        q = q.filter(models.Schedule.bus_id == bus_id)
+    if status:
+        q = q.filter(models.Schedule.status == status)
+    if from_date:
+        q = q.filter(models.Schedule.travel_date >= from_date)
+    if to_date:
+        q = q.filter(models.Schedule.travel_date <= to_date)
+    page = paginate(q, models.Schedule.id, skip, limit, cursor)
+    return [r._asdict() for r in page] if rows else page
 
 def get_schedule(db: Session, schedule_id: int):
     return db.query(models.Schedule).filter_by(id=schedule_id).first()
 
-def get_schedules_by_route(db: Session, source: str, destination: str, travel_date):
-    # join bus and schedules
-    return db.query(models.Schedule).join(models.Bus).filter(
+def route_search_stmt(source: str, destination: str, travel_date):
+    # join bus and schedules, counting free seat rows per schedule in the same query
+    available = (
+        select(func.count(models.Seat.id))
+        .where(models.Seat.schedule_id == models.Schedule.id, models.Seat.is_available.is_(True))
+        .correlate(models.Schedule)
+        .scalar_subquery()
+    )
+    return select(models.Schedule, models.Bus, available).join(models.Bus).where(
         models.Bus.source_stop == source,
         models.Bus.destination_stop == destination,
         models.Schedule.travel_date == travel_date,
         models.Schedule.status == "active"
-    ).all()
+    ).order_by(models.Schedule.departure_time)
+
+def route_search_results(rows):
+    return [
+        {
+            "id": s.id, "bus_id": s.bus_id, "travel_date": s.travel_date,
+            "departure_time": s.departure_time, "arrival_time": s.arrival_time,
+            "fare": s.fare, "status": s.status,
+            "bus": {"id": b.id, "bus_number": b.bus_number, "operator_name": b.operator_name, "bus_type": b.bus_type},
+            "available_seats": s.seat_map.count(SEAT_FREE) if s.seat_map is not None else count,
+        }
+        for s, b, count in rows
+    ]
+
+def get_schedules_by_route(db: Session, source: str, destination: str, travel_date):
+    key = (source, destination, travel_date)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+    results = route_search_results(db.execute(route_search_stmt(source, destination, travel_date)).all())
+    if not db.info.get("replica"):  # a lagging replica could refill a date a booking just invalidated
+        search_cache.set(key, results)
+    return results
 
 def update_schedule(db: Session, schedule_id: int, schedule: schemas.ScheduleCreate):
     db_schedule = db.query(models.Schedule).filter_by(id=schedule_id).first()
     if not db_schedule:
         return None
+    old_date = db_schedule.travel_date
     for key, value in schedule.model_dump().items():
         setattr(db_schedule, key, value)
+    db_schedule.stats_dirty = True
     db.commit(); db.refresh(db_schedule)
+    invalidate_search_date(old_date)
+    invalidate_search_date(db_schedule.travel_date)
+    catalogue.changed(db, "schedule", schedule_id)
+    if old_date != db_schedule.travel_date:
+        refresh_route_stats(db, [old_date])  # nothing dirty is left on the old day to find it
     return db_schedule
 
 def delete_schedule(db: Session, schedule_id: int):
     db_schedule = db.query(models.Schedule).filter_by(id=schedule_id).first()
     if db_schedule:
+        travel_date = db_schedule.travel_date
         db.delete(db_schedule); db.commit()
+        invalidate_search_date(travel_date)
+        catalogue.changed(db, "schedule", schedule_id)
+        refresh_route_stats(db, [travel_date])
         return True
     return False
 
 # --- Seats ---
+SEAT_BATCH_SCHEDULES = 500
+
+def _seat_rows(schedule_id: int, total_seats: int):
+    return [{"schedule_id": schedule_id, "seat_number": i, "is_available": True} for i in range(1, total_seats+1)]
+
 def generate_seats_for_schedule(db: Session, schedule_id: int, total_seats: int):
-    created = []
-    for i in range(1, total_seats+1):
-        seat = models.Seat(schedule_id=schedule_id, seat_number=i, is_available=True)
-        db.add(seat); created.append(seat)
+    # one multi-row INSERT ... RETURNING instead of an insert + refresh per seat
+    created = db.execute(
+        insert(models.Seat).returning(
+            models.Seat.id, models.Seat.schedule_id, models.Seat.seat_number, models.Seat.is_available
+        ),
+        _seat_rows(schedule_id, total_seats)
+    ).mappings().all()
     db.commit()
-    for s in created: db.refresh(s)
+    search_cache.clear()
     return created
 
+def generate_seats_bulk(db: Session, schedule_ids=None, from_date=None, to_date=None, use_map: bool = False):
+    # schedules with neither seat rows nor a seat map, found in a single query
+    q = db.query(models.Schedule.id, models.Bus.total_seats).join(models.Bus).filter(
+        models.Schedule.seat_map.is_(None),
+        ~exists().where(models.Seat.schedule_id == models.Schedule.id)
+    )
+    if schedule_ids:
+        q = q.filter(models.Schedule.id.in_(schedule_ids))
+    if from_date:
+        q = q.filter(models.Schedule.travel_date >= from_date)
+    if to_date:
+        q = q.filter(models.Schedule.travel_date <= to_date)
+    pending = q.order_by(models.Schedule.id).all()
+
+    seats_created = 0
+    for start in range(0, len(pending), SEAT_BATCH_SCHEDULES):
+        batch = pending[start:start + SEAT_BATCH_SCHEDULES]
+        if use_map:
+            db.execute(update(models.Schedule), [{"id": sid, "seat_map": SEAT_FREE * n} for sid, n in batch])
+        else:
+            rows = [row for sid, n in batch for row in _seat_rows(sid, n)]
+            db.execute(insert(models.Seat), rows)
+        seats_created += sum(n for _, n in batch)
+        db.commit()
+    if pending:
+        search_cache.clear()
+    return [sid for sid, _ in pending], seats_created
+
+# --- Compact seat map ---
+SEAT_FREE, SEAT_BOOKED, SEAT_HELD = "0", "1", "2"
+SEAT_STATE_ERRORS = {SEAT_FREE: "is already booked", SEAT_BOOKED: "is not booked", SEAT_HELD: "is not held"}
+SEAT_MAP_RETRIES = 5
+
+class SeatsChanged(ValueError):
+    # the seat map kept changing under us; unlike other booking errors, the same request may succeed on retry
+    def __init__(self):
+        super().__init__("Seats changed while booking, please retry")
+
+def init_seat_map(db: Session, schedule: models.Schedule, total_seats: int):
+    schedule.seat_map = SEAT_FREE * total_seats
+    db.commit(); db.refresh(schedule)
+    invalidate_search_date(schedule.travel_date)
+    return schedule
+
+def seat_map_seats(schedule: models.Schedule, only_available: bool = True):
+    return [
+        {"id": None, "schedule_id": schedule.id, "seat_number": i, "is_available": flag == SEAT_FREE}
+        for i, flag in enumerate(schedule.seat_map, start=1)
+        if not only_available or flag == SEAT_FREE
+    ]
+
+def seat_map_swap_stmt(schedule: models.Schedule, seat_numbers, expected: str, new: str):
+    # compare-and-set the whole map: only matches if nobody changed it since we read it
+    current = schedule.seat_map
+    flags = list(current)
+    for n in seat_numbers:
+        if n < 1 or n > len(flags):
+            raise ValueError(f"Seat {n} not found")
+        if flags[n - 1] != expected:
+            raise ValueError(f"Seat {n} {SEAT_STATE_ERRORS[expected]}")
+        flags[n - 1] = new
+    return (
+        update(models.Schedule)
+        .where(models.Schedule.id == schedule.id, models.Schedule.seat_map == current)
+        .values(seat_map="".join(flags))
+        .execution_options(synchronize_session=False)
+    )
+
+def _swap_seat_map(db: Session, schedule: models.Schedule, seat_numbers, expected: str, new: str):
+    for _ in range(SEAT_MAP_RETRIES):
+        result = db.execute(seat_map_swap_stmt(schedule, seat_numbers, expected, new))
+        db.refresh(schedule)
+        if result.rowcount == 1:
+            return
+    raise SeatsChanged()
+
+def book_seat_map(db: Session, schedule: models.Schedule, seat_numbers):
+    _swap_seat_map(db, schedule, seat_numbers, SEAT_FREE, SEAT_BOOKED)
+
+def release_seat_map(db: Session, schedule: models.Schedule, seat_numbers):
+    _swap_seat_map(db, schedule, seat_numbers, SEAT_BOOKED, SEAT_FREE)
+
+# --- Seat holds ---
+def _hold_seat_numbers(hold: models.SeatHold):
+    return [int(n) for n in hold.seat_numbers.split(",")]
+
+def hold_response(hold: models.SeatHold):
+    return {
+        "id": hold.id, "token": hold.token, "schedule_id": hold.schedule_id,
+        "seat_numbers": _hold_seat_numbers(hold), "expires_at": hold.expires_at, "status": hold.status
+    }
+
+def create_hold(db: Session, hold_in: schemas.SeatHoldCreate, minutes: int):
+    schedule = db.query(models.Schedule).filter_by(id=hold_in.schedule_id).first()
+    if not schedule:
+        raise ValueError("Schedule not found")
+    hold = models.SeatHold(
+        token=secrets.token_urlsafe(16),
+        schedule_id=schedule.id,
+        seat_numbers="",
+        expires_at=datetime.utcnow() + timedelta(minutes=minutes),
+        status="ACTIVE"
+    )
+    db.add(hold); db.flush()  # flush to get id
+    if schedule.seat_map is not None:
+        check_seat_numbers(hold_in.seat_numbers)
+        _swap_seat_map(db, schedule, hold_in.seat_numbers, SEAT_FREE, SEAT_HELD)
+        seat_numbers = hold_in.seat_numbers
+    else:
+        claimed = claim_seat_rows(db, schedule.id, hold_in.seat_ids, hold_in.seat_numbers, hold_id=hold.id)
+        seat_numbers = [n for _, n in claimed]
+    hold.seat_numbers = ",".join(str(n) for n in seat_numbers)
+    stage_seat_event(db, schedule.id, seat_numbers, False)
+    db.commit(); db.refresh(hold)
+    invalidate_search_date(schedule.travel_date)
+    return hold
+
+def claim_hold_stmt(hold_id: int, now: datetime, status: str):
+    # only an active, unexpired hold can move on; the row lock decides races with the sweeper
+    return (
+        update(models.SeatHold)
+        .where(models.SeatHold.id == hold_id, models.SeatHold.status == "ACTIVE", models.SeatHold.expires_at > now)
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+
+def hold_seat_rows_stmt(hold_ids, release: bool):
+    # detach seat rows from their hold, freeing them again when the hold is released
+    values = {"hold_id": None, "is_available": True} if release else {"hold_id": None}
+    return (
+        update(models.Seat)
+        .where(models.Seat.hold_id.in_(hold_ids))
+        .values(**values)
+        .returning(models.Seat.id, models.Seat.seat_number)
+        .execution_options(synchronize_session=False)
+    )
+
+def convert_hold(db: Session, schedule: models.Schedule, token: str):
+    hold = db.query(models.SeatHold).filter_by(token=token, schedule_id=schedule.id).first()
+    if not hold:
+        raise ValueError("Hold not found")
+    if db.execute(claim_hold_stmt(hold.id, datetime.utcnow(), "CONVERTED")).rowcount != 1:
+        raise ValueError("Hold expired or already used")
+    if schedule.seat_map is not None:
+        numbers = _hold_seat_numbers(hold)
+        _swap_seat_map(db, schedule, numbers, SEAT_HELD, SEAT_BOOKED)
+        return [(None, n) for n in numbers]
+    return [tuple(r) for r in db.execute(hold_seat_rows_stmt([hold.id], release=False)).all()]
+
+def _release_holds(db: Session, holds):
+    holds = list(holds)
+    if not holds:
+        return 0
+    db.execute(hold_seat_rows_stmt([h.id for h in holds], release=True))
+    schedules = {}
+    for h in holds:
+        schedule = schedules.get(h.schedule_id) or db.query(models.Schedule).filter_by(id=h.schedule_id).first()
+        schedules[h.schedule_id] = schedule
+        if schedule.seat_map is not None:
+            _swap_seat_map(db, schedule, _hold_seat_numbers(h), SEAT_HELD, SEAT_FREE)
+        stage_seat_event(db, h.schedule_id, _hold_seat_numbers(h), True)
+    db.commit()
+    for schedule in schedules.values():
+        invalidate_search_date(schedule.travel_date)
+    return len(holds)
+
+def release_hold(db: Session, token: str):
+    hold = db.query(models.SeatHold).filter_by(token=token).first()
+    if not hold:
+        return False
+    if db.execute(claim_hold_stmt(hold.id, datetime.utcnow(), "RELEASED")).rowcount != 1:
+        raise ValueError("Hold expired or already used")
+    _release_holds(db, [hold])
+    return True
+
+def release_expired_holds(db: Session):
+    # one transaction per departure, so a contended or inconsistent seat map only delays its own holds;
+    # within it, marking and freeing commit together, so a hold is either converted or expired, never both
+    now = datetime.utcnow()
+    schedule_ids = db.execute(
+        select(models.SeatHold.schedule_id).distinct()
+        .where(models.SeatHold.status == "ACTIVE", models.SeatHold.expires_at <= now)
+        .order_by(models.SeatHold.schedule_id)
+    ).scalars().all()
+    db.commit()
+    released = 0
+    for schedule_id in schedule_ids:
+        try:
+            expired = db.execute(
+                update(models.SeatHold)
+                .where(models.SeatHold.schedule_id == schedule_id, models.SeatHold.status == "ACTIVE",
+                       models.SeatHold.expires_at <= now)
+                .values(status="EXPIRED")
+                .returning(models.SeatHold.id, models.SeatHold.schedule_id, models.SeatHold.seat_numbers)
+                .execution_options(synchronize_session=False)
+            ).all()
+            released += _release_holds(db, expired)
+            db.commit()
+        except (ValueError, SQLAlchemyError):
+            db.rollback()
+            logger.exception("releasing expired holds of schedule %s failed; retrying next sweep", schedule_id)
+    return released
+
 def get_available_seats(db: Session, schedule_id: int):
     return db.query(models.Seat).filter_by(schedule_id=schedule_id, is_available=True).all()
 
+def seat_availability(db: Session, schedule_id: int):
+    # full state of every seat, as the first message of an availability stream
+    schedule = db.query(models.Schedule).filter_by(id=schedule_id).first()
+    if not schedule:
+        return None
+    if schedule.seat_map is not None:
+        seats = enumerate(schedule.seat_map, start=1)
+        return [{"seat_number": n, "is_available": flag == SEAT_FREE} for n, flag in seats]
+    rows = db.query(models.Seat.seat_number, models.Seat.is_available).filter(
+        models.Seat.schedule_id == schedule_id
+    ).order_by(models.Seat.seat_number)
+    return [r._asdict() for r in rows]
+
+def get_available_seat_rows(db: Session, schedule_id: int):
+    # SeatResponse-shaped dicts without building Seat objects
+    q = db.query(models.Seat.seat_number, models.Seat.is_available, models.Seat.id, models.Seat.schedule_id).filter(
+        models.Seat.schedule_id == schedule_id, models.Seat.is_available.is_(True)
+    )
+    return [r._asdict() for r in q]
+
 def get_seat(db: Session, seat_id: int):
     return db.query(models.Seat).filter_by(id=seat_id).first()
 
@@ -120,86 +493,438 @@ def update_seat(db: Session, seat_id: int, is_available: bool):
     if not db_seat:
         return None
     db_seat.is_available = is_available
+    stage_seat_event(db, db_seat.schedule_id, [db_seat.seat_number], is_available)
     db.commit(); db.refresh(db_seat)
+    invalidate_search_date(db_seat.schedule.travel_date)
     return db_seat
 
 def delete_seat(db: Session, seat_id: int):
     db_seat = db.query(models.Seat).filter_by(id=seat_id).first()
     if db_seat:
+        travel_date = db_seat.schedule.travel_date
         db.delete(db_seat); db.commit()
+        invalidate_search_date(travel_date)
         return True
     return False
 
 # --- Booking & seat locking ---
+def _book(db: Session, booking_in: schemas.BookingCreate, schedule: models.Schedule):
+    # reserves the seats and adds the booking to the session; the caller commits
+    if booking_in.hold_token:
+        # seats are already ours; no row locks needed
+        seats = convert_hold(db, schedule, booking_in.hold_token)
+    elif schedule.seat_map is not None:
+        check_seat_numbers(booking_in.seat_numbers)
+        book_seat_map(db, schedule, booking_in.seat_numbers)
+        seats = [(None, n) for n in booking_in.seat_numbers]
+    else:
+        seats = claim_seat_rows(db, schedule.id, booking_in.seat_ids, booking_in.seat_numbers)
+
+    db_booking = new_booking(booking_in, schedule, seats)
+    db.add(db_booking)
+    db.execute(schedule_counters_stmt(schedule.id, len(seats), db_booking.total_fare))
+    stage_seat_event(db, schedule.id, [n for _, n in seats], False)
+    return db_booking
+
+SEATS_TAKEN = "Some seats are already booked"
+SEAT_TAKEN_INDEX = "uq_booking_seats_active_seat"
+
+def is_seat_taken(e: IntegrityError) -> bool:
+    # Postgres drivers name the violated index (psycopg2 diag, asyncpg via __cause__); SQLite only the columns
+    name = (getattr(getattr(e.orig, "diag", None), "constraint_name", None)
+            or getattr(e.orig.__cause__, "constraint_name", None))
+    if name:
+        return name == SEAT_TAKEN_INDEX
+    return "booking_seats.seat_id" in str(e.orig)
+
+def _flush_booking(db: Session):
+    # uq_booking_seats_active_seat rejects the loser of a race the row locks did not catch;
+    # any other violation (e.g. an unknown user_id) is a real error
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        if is_seat_taken(e):
+            raise ValueError(SEATS_TAKEN)
+        raise
+
 def create_booking(db: Session, booking_in: schemas.BookingCreate):
     # calculate fare from schedule
     schedule = db.query(models.Schedule).filter_by(id=booking_in.schedule_id).first()
     if not schedule:
         raise ValueError("Schedule not found")
-    # check all seat availability
-    seats = db.query(models.Seat).filter(models.Seat.id.in_(booking_in.seat_ids)).with_for_update().all()
-    if len(seats) != len(booking_in.seat_ids):
-        raise ValueError("Some seats not found")
-    for s in seats:
-        if not s.is_available:
-            raise ValueError(f"Seat {s.seat_number} is already booked")
-
-    # mark seats booked
-    for s in seats:
-        s.is_available = False
-        db.add(s)
-
-    total_fare = schedule.fare * len(seats)
-    qr_string = f"LOCOTRANZ-{booking_in.schedule_id}-{int(datetime.utcnow().timestamp())}"
-    qr_code = base64.b64encode(qr_string.encode()).decode()
+    db_booking = _book(db, booking_in, schedule)
+    _flush_booking(db)
+    db.commit()
+    invalidate_search_date(schedule.travel_date)
+    return get_booking(db, db_booking.id)
+
+def create_bookings_batch(db: Session, legs):
+    # all legs commit together or not at all; legs are processed in schedule id order so
+    # concurrent batches always take seat locks in the same order and cannot deadlock
+    schedules = {
+        s.id: s for s in db.query(models.Schedule)
+        .filter(models.Schedule.id.in_({leg.schedule_id for leg in legs}))
+        .order_by(models.Schedule.id).all()
+    }
+    booked = [None] * len(legs)
+    for i in sorted(range(len(legs)), key=lambda i: legs[i].schedule_id):
+        try:
+            schedule = schedules.get(legs[i].schedule_id)
+            if not schedule:
+                raise ValueError("Schedule not found")
+            booked[i] = _book(db, legs[i], schedule)
+        except SeatsChanged:
+            db.rollback()
+            raise  # retryable as is, so the router answers 409 rather than a stored 400
+        except ValueError as e:
+            db.rollback()
+            raise ValueError(f"Leg {i + 1}: {e}")
+    _flush_booking(db)
+    ids = [b.id for b in booked]
+    db.commit()
+    for travel_date in {s.travel_date for s in schedules.values()}:
+        invalidate_search_date(travel_date)
+    by_id = {b.id: b for b in _booking_query(db).filter(models.Booking.id.in_(ids)).all()}
+    return [by_id[i] for i in ids]
+
+def check_seat_numbers(seat_numbers):
+    if not seat_numbers or len(set(seat_numbers)) != len(seat_numbers):
+        raise ValueError("Seat numbers must be unique and non-empty")
+
+def requested_seats(seat_ids, seat_numbers):
+    # seat numbers are resolved within the schedule; ids are still accepted from older clients
+    requested = seat_ids or seat_numbers
+    if not requested or len(set(requested)) != len(requested):
+        raise ValueError("Seats must be unique and non-empty")
+    return (models.Seat.id if seat_ids else models.Seat.seat_number), requested
+
+def claim_seats_stmt(schedule_id: int, target, requested, **values):
+    # resolves, checks and books the seats in one statement: a seat that is taken, missing or
+    # belongs to another schedule is simply not returned
+    return (
+        update(models.Seat)
+        .where(models.Seat.schedule_id == schedule_id, target.in_(requested), models.Seat.is_available.is_(True))
+        .values(is_available=False, **values)
+        .returning(models.Seat.id, models.Seat.seat_number)
+        .execution_options(synchronize_session=False)
+    )
+
+def unclaimed_seats_error(target, requested, claimed):
+    key = 0 if target is models.Seat.id else 1
+    missing = sorted(set(requested) - {row[key] for row in claimed})
+    label = "Seat ids" if key == 0 else "Seats"
+    return ValueError(f"{label} not available: {', '.join(map(str, missing))}")
+
+def claim_seat_rows(db: Session, schedule_id: int, seat_ids, seat_numbers, **values):
+    target, requested = requested_seats(seat_ids, seat_numbers)
+    claimed = db.execute(claim_seats_stmt(schedule_id, target, requested, **values)).all()
+    if len(claimed) != len(requested):
+        db.rollback()
+        raise unclaimed_seats_error(target, requested, claimed)
+    return sorted((seat_id, n) for seat_id, n in claimed)
+
+def schedule_counters_stmt(schedule_id: int, seats: int, revenue: float):
+    # runs in the booking's transaction, so counters never drift from the bookings
+    return (
+        update(models.Schedule)
+        .where(models.Schedule.id == schedule_id)
+        .values(seats_sold=models.Schedule.seats_sold + seats, revenue=models.Schedule.revenue + revenue,
+                stats_dirty=True)
+        .execution_options(synchronize_session=False)
+    )
 
+def new_booking(booking_in: schemas.BookingCreate, schedule: models.Schedule, seats):
+    # seats: (seat_id, seat_number) pairs; seat_id is None for seat map schedules
     db_booking = models.Booking(
         user_id=booking_in.user_id,
         schedule_id=booking_in.schedule_id,
         passenger_name=booking_in.passenger_name,
         passenger_phone=booking_in.passenger_phone,
-        total_fare=total_fare,
+        total_fare=schedule.fare * len(seats),
         booking_status="CONFIRMED",
-        qr_code=qr_code,
         created_at=str(datetime.utcnow())
     )
-    db.add(db_booking); db.flush()  # flush to get id
-
-    # create booking seats
-    for s in seats:
-        bs = models.BookingSeat(booking_id=db_booking.id, seat_id=s.id)
-        db.add(bs)
-
-    db.commit()
-    db.refresh(db_booking)
+    # booking seats are inserted with the booking through the relationship cascade
+    db_booking.seats = [models.BookingSeat(seat_id=seat_id, seat_number=seat_number) for seat_id, seat_number in seats]
     return db_booking
 
-def get_bookings(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Booking).offset(skip).limit(limit).all()
+def _booking_query(db: Session):
+    # booking seats and their seat numbers in one extra query, independent of page size
+    return db.query(models.Booking).options(
+        selectinload(models.Booking.seats).joinedload(models.BookingSeat.seat)
+    )
+
+# column order matches BookingSummary; seats are attached by _attach_booking_seats
+BOOKING_ROW_COLUMNS = (
+    models.Booking.passenger_name, models.Booking.passenger_phone, models.Booking.id, models.Booking.user_id,
+    models.Booking.schedule_id, models.Booking.total_fare, models.Booking.booking_status,
+)
+
+def _attach_booking_seats(db: Session, bookings):
+    by_id = {}
+    for b in bookings:
+        b["seats"] = []
+        by_id[b["id"]] = b
+    if not by_id:
+        return bookings
+    seat_rows = (
+        db.query(models.BookingSeat.booking_id, models.BookingSeat.id, models.BookingSeat.seat_id,
+                 func.coalesce(models.BookingSeat.seat_number, models.Seat.seat_number))
+        .outerjoin(models.Seat, models.BookingSeat.seat_id == models.Seat.id)
+        .filter(models.BookingSeat.booking_id.in_(list(by_id)))
+        .order_by(models.BookingSeat.id)
+    )
+    for booking_id, bs_id, seat_id, seat_number in seat_rows:
+        by_id[booking_id]["seats"].append({"id": bs_id, "seat_id": seat_id, "seat_number": seat_number})
+    return bookings
+
+def get_bookings(db: Session, skip: int = 0, limit: int = 100, cursor: str = None,
+                 user_id: int = None, schedule_id: int = None, status: str = None, from_date=None, to_date=None,
+                 rows: bool = False):
+    # rows=True returns BookingResponse-shaped dicts (two queries, no ORM objects)
+    q = db.query(*BOOKING_ROW_COLUMNS) if rows else _booking_query(db)
+    if user_id is not None:
+        q = q.filter(models.Booking.user_id == user_id)
+    if schedule_id is not None:
+        q = q.filter(models.Booking.schedule_id == schedule_id)
+    if status:
+        q = q.filter(models.Booking.booking_status == status)
+    # created_at is stored as "YYYY-MM-DD HH:MM:SS", so string comparison orders by time
+    if from_date:
+        q = q.filter(models.Booking.created_at >= str(from_date))
+    if to_date:
+        q = q.filter(models.Booking.created_at < str(to_date + timedelta(days=1)))
+    page = paginate(q, models.Booking.id, skip, limit, cursor)
+    if rows:
+        return _attach_booking_seats(db, [r._asdict() for r in page])
+    return page
 
 def get_booking(db: Session, booking_id: int):
-    return db.query(models.Booking).filter_by(id=booking_id).first()
+    return _booking_query(db).filter_by(id=booking_id).first()
 
 def update_booking_status(db: Session, booking_id: int, status: str):
     db_booking = db.query(models.Booking).filter_by(id=booking_id).first()
     if not db_booking:
         return None
+    if status == "CANCELLED":
+        # seats must be released with the status change
+        cancel_bookings(db, booking_ids=[booking_id])
+        return get_booking(db, booking_id)
+    if db_booking.booking_status == "CANCELLED":
+        # its seats were released and may be sold again; rebooking goes through POST /bookings/
+        raise ValueError("Cancelled bookings cannot be reinstated")
     db_booking.booking_status = status
-    db.commit(); db.refresh(db_booking)
-    return db_booking
+    db.commit()
+    boarding.changed(db, [db_booking.schedule_id])
+    return get_booking(db, booking_id)
+
+EXPORT_BATCH = 1000
+BOOKING_EXPORT_COLUMNS = [
+    "id", "user_id", "schedule_id", "passenger_name", "passenger_phone", "total_fare",
+    "booking_status", "created_at", "payment_status", "seat_numbers"
+]
+PAYMENT_EXPORT_COLUMNS = [
+    "id", "booking_id", "amount", "payment_method", "status", "transaction_id", "booking_status"
+]
+
+def iter_booking_export(db: Session, since: int = 0):
+    # one row per booking seat, streamed in id order and folded back into one record per booking;
+    # since is an id watermark, so rows changed after they were pulled are only seen by a full pull
+    payment_status = (
+        select(models.Payment.status)
+        .where(models.Payment.booking_id == models.Booking.id)
+        .order_by(models.Payment.id.desc())
+        .limit(1)
+        .correlate(models.Booking)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            models.Booking.id, models.Booking.user_id, models.Booking.schedule_id,
+            models.Booking.passenger_name, models.Booking.passenger_phone, models.Booking.total_fare,
+            models.Booking.booking_status, models.Booking.created_at,
+            payment_status.label("payment_status"),
+            func.coalesce(models.BookingSeat.seat_number, models.Seat.seat_number).label("seat_number"),
+        )
+        .outerjoin(models.BookingSeat, models.BookingSeat.booking_id == models.Booking.id)
+        .outerjoin(models.Seat, models.Seat.id == models.BookingSeat.seat_id)
+        .where(models.Booking.id > since)
+        .order_by(models.Booking.id, models.BookingSeat.id)
+        .execution_options(yield_per=EXPORT_BATCH)
+    )
+    rows = db.execute(stmt).mappings()
+    for _, group in groupby(rows, key=lambda r: r["id"]):
+        group = list(group)
+        record = {c: group[0][c] for c in BOOKING_EXPORT_COLUMNS[:-1]}
+        record["seat_numbers"] = [r["seat_number"] for r in group if r["seat_number"] is not None]
+        yield record
+
+def iter_payment_export(db: Session, since: int = 0):
+    # id watermark like iter_booking_export: new payments only, not status changes to pulled ones
+    stmt = (
+        select(
+            models.Payment.id, models.Payment.booking_id, models.Payment.amount,
+            models.Payment.payment_method, models.Payment.status, models.Payment.transaction_id,
+            models.Booking.booking_status,
+        )
+        .outerjoin(models.Booking, models.Booking.id == models.Payment.booking_id)
+        .where(models.Payment.id > since)
+        .order_by(models.Payment.id)
+        .execution_options(yield_per=EXPORT_BATCH)
+    )
+    for row in db.execute(stmt).mappings():
+        yield dict(row)
+
+def serialize_booking(booking: models.Booking):
+    # expects seats loaded through _booking_query
+    return {
+        "id": booking.id,
+        "user_id": booking.user_id,
+        "schedule_id": booking.schedule_id,
+        "passenger_name": booking.passenger_name,
+        "passenger_phone": booking.passenger_phone,
+        "total_fare": booking.total_fare,
+        "booking_status": booking.booking_status,
+        "seats": [
+            {"id": bs.id, "seat_id": bs.seat_id,
+             "seat_number": bs.seat_number if bs.seat_number is not None else bs.seat.seat_number}
+            for bs in booking.seats
+        ],
+        "qr_code": tickets.payload(booking.id, booking.schedule_id)
+    }
+
+def get_booking_schedule_id(db: Session, booking_id: int):
+    return db.query(models.Booking.schedule_id).filter(models.Booking.id == booking_id).scalar()
+
+def cancel_bookings(db: Session, booking_ids=None, schedule_id: int = None):
+    # soft cancel: rows are kept for history, seats are released set-based whatever the booking count
+    q = update(models.Booking).where(models.Booking.booking_status != "CANCELLED")
+    if booking_ids is not None:
+        q = q.where(models.Booking.id.in_(booking_ids))
+    if schedule_id is not None:
+        q = q.where(models.Booking.schedule_id == schedule_id)
+    # flipping the status first means concurrent cancels of the same booking release its seats once
+    cancelled_rows = db.execute(
+        q.values(booking_status="CANCELLED")
+        .returning(models.Booking.id, models.Booking.schedule_id, models.Booking.total_fare)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not cancelled_rows:
+        db.commit()
+        return [], 0
+    cancelled = [r.id for r in cancelled_rows]
+    seat_counts = Counter(db.execute(
+        update(models.BookingSeat)
+        .where(models.BookingSeat.booking_id.in_(cancelled))
+        .values(active=False)
+        .returning(models.BookingSeat.booking_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all())
+    counters = {}
+    for r in cancelled_rows:
+        seats, revenue = counters.get(r.schedule_id, (0, 0.0))
+        counters[r.schedule_id] = (seats + seat_counts[r.id], revenue + r.total_fare)
+    for sid, (seats, revenue) in sorted(counters.items()):
+        db.execute(schedule_counters_stmt(sid, -seats, -revenue))
+    released = db.execute(
+        update(models.Seat)
+        .where(models.Seat.id.in_(
+            select(models.BookingSeat.seat_id).where(models.BookingSeat.booking_id.in_(cancelled))
+        ))
+        .values(is_available=True)
+        .returning(models.Seat.schedule_id, models.Seat.seat_number)
+        .execution_options(synchronize_session=False)
+    ).all()
+    map_seats = db.execute(
+        select(models.Booking.schedule_id, models.BookingSeat.seat_number)
+        .join(models.BookingSeat, models.BookingSeat.booking_id == models.Booking.id)
+        .where(models.Booking.id.in_(cancelled), models.BookingSeat.seat_id.is_(None))
+        .order_by(models.Booking.schedule_id)
+    ).all()
+    by_schedule = {}
+    for sid, seat_number in released:
+        by_schedule.setdefault(sid, []).append(seat_number)
+    schedules = {
+        s.id: s for s in db.query(models.Schedule).filter(
+            models.Schedule.id.in_({sid for sid, _ in released} | {sid for sid, _ in map_seats})
+        )
+    }
+    for sid, rows in groupby(map_seats, key=lambda r: r[0]):
+        numbers = [n for _, n in rows]
+        release_seat_map(db, schedules[sid], numbers)  # one compare-and-set per schedule
+        by_schedule.setdefault(sid, []).extend(numbers)
+    for sid, numbers in by_schedule.items():
+        stage_seat_event(db, sid, numbers, True)
+    db.commit()
+    for travel_date in {s.travel_date for s in schedules.values()}:
+        invalidate_search_date(travel_date)
+    boarding.changed(db, sorted(counters))
+    return cancelled, len(released) + len(map_seats)
 
 def delete_booking(db: Session, booking_id: int):
-    db_booking = db.query(models.Booking).filter_by(id=booking_id).first()
-    if db_booking:
-        # Release seats back to available
-        for bs in db_booking.seats:
-            seat = db.query(models.Seat).filter_by(id=bs.seat_id).first()
-            if seat:
-                seat.is_available = True
-                db.add(seat)
-        db.delete(db_booking); db.commit()
-        return True
-    return False
+    if not db.query(exists().where(models.Booking.id == booking_id)).scalar():
+        return False
+    cancel_bookings(db, booking_ids=[booking_id])
+    return True
+
+# --- Dashboard stats ---
+def refresh_route_stats(db: Session, travel_dates=()):
+    # incremental: only days with a dirty schedule (plus any given) are recomputed, from the
+    # per-schedule counters rather than from bookings; a booking committing meanwhile re-marks its schedule
+    dirty = db.execute(
+        update(models.Schedule)
+        .where(models.Schedule.stats_dirty.is_(True))
+        .values(stats_dirty=False)
+        .returning(models.Schedule.travel_date)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    days = set(dirty) | set(travel_dates)
+    if not days:
+        db.commit()
+        return 0
+    db.execute(delete(models.RouteDayStats).where(models.RouteDayStats.travel_date.in_(days)))
+    db.execute(insert(models.RouteDayStats).from_select(
+        ["travel_date", "source_stop", "destination_stop", "schedules", "seats_total", "seats_sold", "revenue"],
+        select(
+            models.Schedule.travel_date, models.Bus.source_stop, models.Bus.destination_stop,
+            func.count(models.Schedule.id), func.sum(models.Bus.total_seats),
+            func.sum(models.Schedule.seats_sold), func.sum(models.Schedule.revenue),
+        )
+        .join(models.Bus, models.Schedule.bus_id == models.Bus.id)
+        .where(models.Schedule.travel_date.in_(days))
+        .group_by(models.Schedule.travel_date, models.Bus.source_stop, models.Bus.destination_stop)
+    ))
+    db.commit()
+    return len(days)
+
+def _load_factor(row):
+    return dict(row, load_factor=round(row["seats_sold"] / row["seats_total"], 4) if row["seats_total"] else 0.0)
+
+def get_fleet_stats(db: Session, from_date, to_date):
+    # reads only the summary table: cost grows with routes x days, not with bookings
+    s = models.RouteDayStats
+    totals = (
+        func.sum(s.schedules).label("schedules"), func.sum(s.seats_total).label("seats_total"),
+        func.sum(s.seats_sold).label("seats_sold"), func.sum(s.revenue).label("revenue"),
+    )
+    in_range = (s.travel_date >= from_date, s.travel_date <= to_date)
+    days = db.execute(
+        select(s.travel_date, *totals).where(*in_range).group_by(s.travel_date).order_by(s.travel_date)
+    ).mappings().all()
+    routes = db.execute(
+        select(s.source_stop, s.destination_stop, *totals).where(*in_range)
+        .group_by(s.source_stop, s.destination_stop).order_by(s.source_stop, s.destination_stop)
+    ).mappings().all()
+    return {"days": [_load_factor(r) for r in days], "routes": [_load_factor(r) for r in routes]}
+
+def get_schedule_loads(db: Session, travel_date, skip: int = 0, limit: int = 100, cursor: str = None):
+    q = db.query(
+        models.Schedule.id, models.Schedule.travel_date, models.Schedule.departure_time, models.Bus.bus_number,
+        models.Bus.source_stop, models.Bus.destination_stop, models.Bus.total_seats.label("seats_total"),
+        models.Schedule.seats_sold, models.Schedule.revenue,
+    ).join(models.Bus, models.Schedule.bus_id == models.Bus.id).filter(models.Schedule.travel_date == travel_date)
+    return [_load_factor(r._asdict()) for r in paginate(q, models.Schedule.id, skip, limit, cursor)]
 
 # --- Payments ---
 def create_payment(db: Session, payment_in: schemas.PaymentCreate):
@@ -216,8 +941,14 @@ def create_payment(db: Session, payment_in: schemas.PaymentCreate):
     db.add(pay); db.commit(); db.refresh(pay)
     return pay
 
-def get_payments(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Payment).offset(skip).limit(limit).all()
+def get_payments(db: Session, skip: int = 0, limit: int = 100, cursor: str = None,
+                 booking_id: int = None, status: str = None):
+    q = db.query(models.Payment)
+    if booking_id is not None:
+        q = q.filter(models.Payment.booking_id == booking_id)
+    if status:
+        q = q.filter(models.Payment.status == status)
+    return paginate(q, models.Payment.id, skip, limit, cursor)
 
 def get_payment(db: Session, payment_id: int):
     return db.query(models.Payment).filter_by(id=payment_id).first()
@@ -0,0 +1,97 @@
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from . import models, schemas
+from .cache import search_cache, invalidate_search_date
+from .seat_stream import stage as stage_seat_event
+from .crud import (
+    SEAT_FREE, SEAT_BOOKED, SEAT_HELD, SEAT_MAP_RETRIES, route_search_stmt, route_search_results,
+    seat_map_swap_stmt, seat_map_seats, check_seat_numbers, requested_seats, claim_seats_stmt, unclaimed_seats_error, new_booking,
+    claim_hold_stmt, hold_seat_rows_stmt, _hold_seat_numbers, SEATS_TAKEN, is_seat_taken,
+    schedule_counters_stmt, SeatsChanged
+)
+
+# Async versions of the hot-path crud functions, used when DB_ASYNC is enabled.
+# Query building is shared with crud so both paths issue the same SQL.
+
+async def get_schedule(db: AsyncSession, schedule_id: int):
+    return await db.get(models.Schedule, schedule_id)
+
+async def get_schedules_by_route(db: AsyncSession, source: str, destination: str, travel_date):
+    key = (source, destination, travel_date)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+    results = route_search_results((await db.execute(route_search_stmt(source, destination, travel_date))).all())
+    if not db.info.get("replica"):  # a lagging replica could refill a date a booking just invalidated
+        search_cache.set(key, results)
+    return results
+
+async def get_available_seats(db: AsyncSession, schedule: models.Schedule):
+    if schedule.seat_map is not None:
+        return seat_map_seats(schedule)
+    result = await db.execute(select(models.Seat).filter_by(schedule_id=schedule.id, is_available=True))
+    return result.scalars().all()
+
+async def _swap_seat_map(db: AsyncSession, schedule: models.Schedule, seat_numbers, expected: str, new: str):
+    for _ in range(SEAT_MAP_RETRIES):
+        result = await db.execute(seat_map_swap_stmt(schedule, seat_numbers, expected, new))
+        await db.refresh(schedule)
+        if result.rowcount == 1:
+            return
+    raise SeatsChanged()
+
+async def convert_hold(db: AsyncSession, schedule: models.Schedule, token: str):
+    hold = (await db.execute(select(models.SeatHold).filter_by(token=token, schedule_id=schedule.id))).scalars().first()
+    if not hold:
+        raise ValueError("Hold not found")
+    if (await db.execute(claim_hold_stmt(hold.id, datetime.utcnow(), "CONVERTED"))).rowcount != 1:
+        raise ValueError("Hold expired or already used")
+    if schedule.seat_map is not None:
+        numbers = _hold_seat_numbers(hold)
+        await _swap_seat_map(db, schedule, numbers, SEAT_HELD, SEAT_BOOKED)
+        return [(None, n) for n in numbers]
+    return [tuple(r) for r in (await db.execute(hold_seat_rows_stmt([hold.id], release=False))).all()]
+
+async def get_booking(db: AsyncSession, booking_id: int):
+    result = await db.execute(
+        select(models.Booking)
+        .options(selectinload(models.Booking.seats).joinedload(models.BookingSeat.seat))
+        .filter_by(id=booking_id)
+    )
+    return result.scalars().first()
+
+async def create_booking(db: AsyncSession, booking_in: schemas.BookingCreate):
+    schedule = await db.get(models.Schedule, booking_in.schedule_id)
+    if not schedule:
+        raise ValueError("Schedule not found")
+    if booking_in.hold_token:
+        seats = await convert_hold(db, schedule, booking_in.hold_token)
+    elif schedule.seat_map is not None:
+        check_seat_numbers(booking_in.seat_numbers)
+        await _swap_seat_map(db, schedule, booking_in.seat_numbers, SEAT_FREE, SEAT_BOOKED)
+        seats = [(None, n) for n in booking_in.seat_numbers]
+    else:
+        target, requested = requested_seats(booking_in.seat_ids, booking_in.seat_numbers)
+        claimed = (await db.execute(claim_seats_stmt(schedule.id, target, requested))).all()
+        if len(claimed) != len(requested):
+            await db.rollback()
+            raise unclaimed_seats_error(target, requested, claimed)
+        seats = sorted(tuple(row) for row in claimed)
+
+    db_booking = new_booking(booking_in, schedule, seats)
+    db.add(db_booking)
+    await db.execute(schedule_counters_stmt(schedule.id, len(seats), db_booking.total_fare))
+    stage_seat_event(db, schedule.id, [n for _, n in seats], False)
+    try:
+        await db.flush()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_seat_taken(e):
+            raise ValueError(SEATS_TAKEN)
+        raise
+    await db.commit()
+    invalidate_search_date(schedule.travel_date)
+    return await get_booking(db, db_booking.id)
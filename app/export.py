@@ -0,0 +1,32 @@
+import csv
+import io
+import json
+from fastapi.responses import StreamingResponse
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def _csv_value(value):
+    return " ".join(str(v) for v in value) if isinstance(value, list) else value
+
+def _lines(rows, fmt: str, columns):
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(columns)
+        yield buf.getvalue()  # an empty export is still a valid CSV with its header
+        buf.seek(0); buf.truncate()
+        for row in rows:
+            writer.writerow([_csv_value(row[c]) for c in columns])
+            yield buf.getvalue()
+            buf.seek(0); buf.truncate()
+    else:
+        for row in rows:
+            yield json.dumps(row, default=str) + "\n"
+
+def stream_rows(rows, fmt: str, columns, filename: str):
+    # rows is a generator over a server-side cursor, so memory stays flat however large the export
+    return StreamingResponse(
+        _lines(rows, fmt, columns),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import models
+from .config import settings
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# outcomes that say "try again" rather than answer the request; they are not stored against the key
+RETRYABLE_STATUSES = (409, 429)
+
+# in-process front for completed responses: (scope, key) -> (request_hash, status, body, expires_at)
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+
+def _lru_get(cache_key):
+    with _lru_lock:
+        entry = _lru.get(cache_key)
+        if entry is None:
+            return None
+        if entry[3] <= datetime.utcnow():
+            del _lru[cache_key]
+            return None
+        _lru.move_to_end(cache_key)
+        return entry
+
+def _lru_put(cache_key, entry):
+    with _lru_lock:
+        _lru[cache_key] = entry
+        _lru.move_to_end(cache_key)
+        while len(_lru) > settings.IDEMPOTENCY_LRU_SIZE:
+            _lru.popitem(last=False)
+
+def request_hash(payload) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+def _replay(entry, req_hash: str):
+    stored_hash, status, body, _ = entry
+    if stored_hash != req_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    return JSONResponse(status_code=status, content=body, headers={"Idempotent-Replayed": "true"})
+
+def begin(db: Session, scope: str, key: str, req_hash: str):
+    # returns a replayed response, or None after reserving the key for this request
+    entry = _lru_get((scope, key))
+    if entry is not None:
+        return _replay(entry, req_hash)
+    now = datetime.utcnow()
+    row = db.query(models.IdempotencyKey).filter_by(scope=scope, key=key).first()
+    if row is not None and row.expires_at <= now:
+        db.delete(row); db.commit()
+        row = None
+    if row is None:
+        # a short lease while running; finish() extends it to the full TTL
+        db.add(models.IdempotencyKey(
+            scope=scope, key=key, request_hash=req_hash,
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+        ))
+        try:
+            db.commit()
+            return None
+        except IntegrityError:
+            # a concurrent retry reserved it first
+            db.rollback()
+            row = db.query(models.IdempotencyKey).filter_by(scope=scope, key=key).first()
+    if row.response_status is None:
+        if row.request_hash != req_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+    entry = (row.request_hash, row.response_status, json.loads(row.response_body), row.expires_at)
+    _lru_put((scope, key), entry)
+    return _replay(entry, req_hash)
+
+def finish(db: Session, scope: str, key: str, status: int, body):
+    row = db.query(models.IdempotencyKey).filter_by(scope=scope, key=key).first()
+    if row is None or row.response_status is not None:
+        return  # the lease ran out and a retry took the key over
+    row.response_status = status
+    row.response_body = json.dumps(body)
+    row.expires_at = datetime.utcnow() + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+    db.commit()
+    _lru_put((scope, key), (row.request_hash, status, body, row.expires_at))
+
+def abandon(db: Session, scope: str, key: str):
+    # unexpected failure: let the next retry run the request again
+    db.query(models.IdempotencyKey).filter_by(scope=scope, key=key, response_status=None).delete()
+    db.commit()
+
+def purge_expired(db: Session):
+    deleted = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.expires_at <= datetime.utcnow()).delete()
+    db.commit()
+    return deleted
+
+def run(db: Session, scope: str, key: str, payload, response_model, execute):
+    # execute() returns the response body or raises HTTPException; both outcomes are stored
+    replay = begin(db, scope, key, request_hash(payload))
+    if replay is not None:
+        return replay
+    try:
+        body = execute()
+    except HTTPException as e:
+        db.rollback()
+        if e.status_code < 500 and e.status_code not in RETRYABLE_STATUSES:
+            finish(db, scope, key, e.status_code, {"detail": e.detail})
+        else:
+            abandon(db, scope, key)
+        raise
+    except Exception:
+        db.rollback()
+        abandon(db, scope, key)
+        raise
+    body = response_model.model_validate(body).model_dump(mode="json")
+    finish(db, scope, key, 200, body)
+    return body
+
+async def run_async(db, scope: str, key: str, payload, response_model, execute):
+    # same as run() for AsyncSession handlers; execute is a coroutine function
+    req_hash = request_hash(payload)
+    replay = await db.run_sync(lambda s: begin(s, scope, key, req_hash))
+    if replay is not None:
+        return replay
+    try:
+        body = await execute()
+    except HTTPException as e:
+        await db.rollback()
+        if e.status_code < 500 and e.status_code not in RETRYABLE_STATUSES:
+            await db.run_sync(lambda s: finish(s, scope, key, e.status_code, {"detail": e.detail}))
+        else:
+            await db.run_sync(lambda s: abandon(s, scope, key))
+        raise
+    except Exception:
+        await db.rollback()
+        await db.run_sync(lambda s: abandon(s, scope, key))
+        raise
+    body = response_model.model_validate(body).model_dump(mode="json")
+    await db.run_sync(lambda s: finish(s, scope, key, 200, body))
+    return body
@@ -1,16 +1,101 @@
+import asyncio
+import logging
+import os
 from fastapi import FastAPI
-from .database import engine, Base
-from .routers import buses, schedules, seats, bookings, payments, users
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+from . import crud, idempotency, metrics, boarding
+from .catalogue import catalogue
+from .notify import start_listener, stop_listener
+from .config import settings
+from .database import engine, SessionLocal, pool_status, replicas, check_replicas, replica_status
+from .read_your_writes import ReadYourWritesMiddleware
+from .routers import buses, schedules, seats, bookings, payments, users, admin, tickets
 
 from contextlib import asynccontextmanager
 
+logger = logging.getLogger(__name__)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SWEEP_TASKS = (
+    ("seat hold release", crud.release_expired_holds),
+    ("idempotency purge", idempotency.purge_expired),
+    ("route stats refresh", crud.refresh_route_stats),
+    ("boarding preload", lambda db: boarding.index.preload(db, settings.BOARDING_PRELOAD_MINUTES)),
+)
+
+def _sweep_once():
+    # each task gets its own session and counts 0 when it fails, so one failure never skips the others
+    results = []
+    for name, task in SWEEP_TASKS:
+        db = SessionLocal()
+        try:
+            results.append(task(db))
+        except Exception:
+            logger.exception("%s failed", name)
+            results.append(0)
+        finally:
+            db.close()
+    return results
+
+def _migrate():
+    from alembic import command
+    from alembic.config import Config
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    config.attributes["configure_logger"] = False  # keep the app's logging setup
+    command.upgrade(config, "head")
+
+def _warm_catalogue():
+    db = SessionLocal()
+    try:
+        return catalogue.load(db, settings.CATALOGUE_PRELOAD_DAYS)
+    finally:
+        db.close()
+
+async def sweep_expired():
+    # frees seats of holds that were never converted into bookings, drops stale idempotency keys,
+    # brings the dashboard summary up to date and loads boarding manifests of upcoming departures
+    while True:
+        await asyncio.sleep(settings.SEAT_HOLD_SWEEP_SECONDS)
+        try:
+            released, purged, refreshed, boarding_loaded = await run_in_threadpool(_sweep_once)
+            if released or purged or refreshed or boarding_loaded:
+                logger.info("released %d expired seat holds, purged %d idempotency keys, refreshed stats of %d days, "
+                            "loaded %d boarding manifests", released, purged, refreshed, boarding_loaded)
+        except Exception:
+            logger.exception("expiry sweep failed")
+
+async def watch_replicas():
+    # replicas failing the probe or lagging too far are skipped until they recover
+    while True:
+        try:
+            await run_in_threadpool(check_replicas)
+        except Exception:
+            logger.exception("replica health check failed")
+        await asyncio.sleep(settings.DB_REPLICA_CHECK_SECONDS)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # create tables (for development)
-    Base.metadata.create_all(bind=engine)
+    # schema is managed by alembic (see alembic.ini); opt in to migrating here for development
+    if settings.DB_AUTO_MIGRATE:
+        await run_in_threadpool(_migrate)
+    buses_loaded, schedules_loaded = await run_in_threadpool(_warm_catalogue)
+    logger.info("catalogue warmed with %d buses, %d schedules", buses_loaded, schedules_loaded)
+    start_listener(engine)
+    sweeper = asyncio.create_task(sweep_expired())
+    watcher = asyncio.create_task(watch_replicas()) if replicas else None
     yield
+    sweeper.cancel()
+    if watcher:
+        watcher.cancel()
+    stop_listener()
 
 app = FastAPI(title="LOCOTRANZ — Bus Booking API", lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+if replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+metrics.install_query_hooks()
 
 app.include_router(users.router)
 app.include_router(buses.router)
@@ -18,7 +103,34 @@ app.include_router(schedules.router)
 app.include_router(seats.router)
 app.include_router(bookings.router)
 app.include_router(payments.router)
+app.include_router(admin.router)
+app.include_router(tickets.router)
 
 @app.get("/")
 def root():
     return {"msg": "LOCOTRANZ API running"}
+
+@app.get("/health/catalogue")
+def health_catalogue():
+    # in-process bus/schedule cache size and hit rate
+    return catalogue.stats()
+
+@app.get("/health/boarding")
+def health_boarding():
+    # departures whose manifest is in memory for ticket verification
+    return boarding.index.stats()
+
+@app.get("/health/pool")
+def health_pool():
+    # connection pool usage, for sizing workers against DB_POOL_SIZE / DB_MAX_OVERFLOW
+    return pool_status()
+
+@app.get("/health/replicas")
+def health_replicas():
+    # read replicas in rotation for GET requests, with their last measured lag
+    return replica_status()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    # Prometheus text exposition: per-route latency, SQL count/time per request, pool and catalogue gauges
+    return PlainTextResponse(metrics.render(pool_status(), catalogue.stats()), media_type="text/plain; version=0.0.4")
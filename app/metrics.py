@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+class Histogram:
+    # cumulative-bucket histogram per label set, rendered in Prometheus text format
+    def __init__(self, name: str, help_text: str, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self, label_names):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, value_sum) in sorted(self._series.items()):
+                base = _labels(label_names, labels)
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {total}')
+                lines.append(f"{self.name}_sum{{{base}}} {value_sum}")
+                lines.append(f"{self.name}_count{{{base}}} {total}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, value: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + value
+
+    def render(self, label_names):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._series.items()):
+                lines.append(f"{self.name}{{{_labels(label_names, labels)}}} {value}")
+        return lines
+
+def _labels(names, values):
+    return ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+
+def _gauges(name: str, help_text: str, values: dict):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines += [f'{name}{{stat="{k}"}} {v}' for k, v in values.items() if isinstance(v, (int, float))]
+    return lines
+
+request_latency = Histogram("http_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS)
+request_queries = Histogram("http_request_db_queries", "SQL statements issued per request.", QUERY_COUNT_BUCKETS)
+request_db_time = Histogram("http_request_db_duration_seconds", "Time spent in SQL per request.", LATENCY_BUCKETS)
+requests_total = Counter("http_requests_total", "Requests by route and status.")
+slow_queries_total = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS by route.")
+
+class RequestStats:
+    __slots__ = ("scope", "queries", "db_time")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+
+    @property
+    def route(self):
+        # route template rather than the raw path, to keep label cardinality bounded;
+        # the router records the match on the shared scope dict
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+# mutated in place, so queries run from the threadpool are still attributed to the request
+current_request: ContextVar = ContextVar("current_request", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        route = stats.route if stats is not None else "-"
+        slow_queries_total.inc((route,))
+        logger.warning("slow query %.1fms on %s: %s", elapsed * 1000, route, " ".join(statement.split())[:500])
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+def install_query_hooks():
+    # on the Engine class so the async engine's sync_engine is covered too
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            elapsed = time.perf_counter() - start
+            labels = (scope["method"], stats.route)
+            request_latency.observe(labels, elapsed)
+            request_queries.observe(labels, stats.queries)
+            request_db_time.observe(labels, stats.db_time)
+            requests_total.inc(labels + (status,))
+
+def render(pool: dict, catalogue: dict):
+    lines = []
+    lines += request_latency.render(("method", "route"))
+    lines += request_queries.render(("method", "route"))
+    lines += request_db_time.render(("method", "route"))
+    lines += requests_total.render(("method", "route", "status"))
+    lines += slow_queries_total.render(("route",))
+    lines += _gauges("db_pool", "Connection pool usage, as on /health/pool.", pool)
+    lines += _gauges("catalogue", "In-process catalogue size and hit counters.", catalogue)
+    return "\n".join(lines) + "\n"
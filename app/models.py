@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Boolean, ForeignKey,
-    Float, Date, Time, Text
+    Float, Date, Time, Text, Index, DateTime, UniqueConstraint, true
 )
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -25,6 +25,7 @@ class Bus(Base):
     destination_stop = Column(String, nullable=False)
     total_seats = Column(Integer, nullable=False)
     schedules = relationship("Schedule", back_populates="bus")
+    __table_args__ = (Index("ix_buses_route", "source_stop", "destination_stop"),)
 
 class Schedule(Base):
     __tablename__ = "schedules"
@@ -35,9 +36,21 @@ class Schedule(Base):
     arrival_time = Column(Time, nullable=False)
     fare = Column(Float, nullable=False, default=0.0)
     status = Column(String, default="active")
+    # compact inventory: one char per seat ("0" free, "1" booked, "2" held); NULL means seats live in the seats table
+    seat_map = Column(String, nullable=True)
+    # kept in step by create_booking / cancel_bookings, for the admin dashboard
+    seats_sold = Column(Integer, nullable=False, default=0, server_default="0")
+    revenue = Column(Float, nullable=False, default=0.0, server_default="0")
+    # set whenever the counters change; refresh_route_stats recomputes the travel days of dirty schedules
+    stats_dirty = Column(Boolean, nullable=False, default=True, server_default=true())
     bus = relationship("Bus", back_populates="schedules")
     seats = relationship("Seat", back_populates="schedule", cascade="all, delete-orphan")
     bookings = relationship("Booking", back_populates="schedule")
+    __table_args__ = (
+        Index("ix_schedules_bus_date_status", "bus_id", "travel_date", "status"),
+        Index("ix_schedules_travel_date", "travel_date", "id"),
+        Index("ix_schedules_stats_dirty", "travel_date", postgresql_where=stats_dirty, sqlite_where=stats_dirty),
+    )
 
 class Seat(Base):
     __tablename__ = "seats"
@@ -45,8 +58,25 @@ class Seat(Base):
     schedule_id = Column(Integer, ForeignKey("schedules.id"))
     seat_number = Column(Integer, nullable=False)
     is_available = Column(Boolean, default=True)
+    hold_id = Column(Integer, ForeignKey("seat_holds.id"), nullable=True)  # set while held, before booking
     schedule = relationship("Schedule", back_populates="seats")
     booked_seat = relationship("BookingSeat", back_populates="seat", uselist=False)
+    __table_args__ = (
+        Index("ix_seats_schedule_available", "schedule_id", "is_available"),
+        # one row per seat of a schedule (a unique index so SQLite can add it without a table rebuild)
+        Index("uq_seats_schedule_seat_number", "schedule_id", "seat_number", unique=True),
+        Index("ix_seats_hold", "hold_id"),
+    )
+
+class SeatHold(Base):
+    __tablename__ = "seat_holds"
+    id = Column(Integer, primary_key=True, index=True)
+    token = Column(String, unique=True, nullable=False)
+    schedule_id = Column(Integer, ForeignKey("schedules.id"), nullable=False)
+    seat_numbers = Column(String, nullable=False)  # comma separated
+    expires_at = Column(DateTime, nullable=False)
+    status = Column(String, default="ACTIVE")  # ACTIVE, CONVERTED, EXPIRED, RELEASED
+    __table_args__ = (Index("ix_seat_holds_status_expires", "status", "expires_at"),)
 
 class Booking(Base):
     __tablename__ = "bookings"
@@ -63,14 +93,29 @@ class Booking(Base):
     schedule = relationship("Schedule", back_populates="bookings")
     seats = relationship("BookingSeat", back_populates="booking", cascade="all, delete-orphan")
     payment = relationship("Payment", back_populates="booking", uselist=False)
+    __table_args__ = (
+        Index("ix_bookings_user", "user_id", "id"),
+        Index("ix_bookings_schedule", "schedule_id", "id"),
+        Index("ix_bookings_status", "booking_status", "id"),
+        Index("ix_bookings_created_at", "created_at"),
+    )
 
 class BookingSeat(Base):
     __tablename__ = "booking_seats"
     id = Column(Integer, primary_key=True, index=True)
     booking_id = Column(Integer, ForeignKey("bookings.id"))
-    seat_id = Column(Integer, ForeignKey("seats.id"))
+    seat_id = Column(Integer, ForeignKey("seats.id"), nullable=True)  # NULL for seat_map schedules
+    seat_number = Column(Integer, nullable=True)
+    # cleared when the booking is cancelled; the row is kept for history
+    active = Column(Boolean, nullable=False, default=True, server_default=true())
     booking = relationship("Booking", back_populates="seats")
     seat = relationship("Seat", back_populates="booked_seat")
+    __table_args__ = (
+        Index("ix_booking_seats_booking", "booking_id"),
+        # a seat can be in at most one active booking: a concurrent double sale fails at commit
+        Index("uq_booking_seats_active_seat", "seat_id", unique=True,
+              postgresql_where=active, sqlite_where=active),
+    )
 
 class Payment(Base):
     __tablename__ = "payments"
@@ -81,3 +126,36 @@ class Payment(Base):
     status = Column(String, default="PENDING")
     transaction_id = Column(String, nullable=True)
     booking = relationship("Booking", back_populates="payment")
+    __table_args__ = (
+        Index("ix_payments_booking", "booking_id"),
+        Index("ix_payments_status", "status", "id"),
+    )
+
+class RouteDayStats(Base):
+    # summary of schedules per route and travel day, rebuilt per day by refresh_route_stats
+    __tablename__ = "route_day_stats"
+    id = Column(Integer, primary_key=True, index=True)
+    travel_date = Column(Date, nullable=False)
+    source_stop = Column(String, nullable=False)
+    destination_stop = Column(String, nullable=False)
+    schedules = Column(Integer, nullable=False)
+    seats_total = Column(Integer, nullable=False)
+    seats_sold = Column(Integer, nullable=False)
+    revenue = Column(Float, nullable=False)
+    __table_args__ = (
+        Index("uq_route_day_stats_day_route", "travel_date", "source_stop", "destination_stop", unique=True),
+    )
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)  # endpoint, e.g. "bookings"
+    key = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)
+    response_status = Column(Integer, nullable=True)  # NULL while the first request is running
+    response_body = Column(Text, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_scope_key"),
+        Index("ix_idempotency_expires_at", "expires_at"),
+    )
@@ -0,0 +1,79 @@
+import logging
+import select as select_module
+import threading
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# channel -> handler(payload); payload is None when notifications may have been missed
+_handlers = {}
+_listener = None
+
+def register(channel: str, handler):
+    _handlers[channel] = handler
+
+def listening():
+    # only route through NOTIFY when this worker will also receive it back
+    return _listener is not None
+
+def send(db, channel: str, payload: str):
+    # transactional: delivered to listeners when the surrounding transaction commits
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+class Listener:
+    # LISTEN on a dedicated connection so writes in other workers reach this one
+    def __init__(self, engine):
+        self.engine = engine
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="notify-listener", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("notify listener failed, reconnecting")
+                for handler in _handlers.values():
+                    handler(None)
+                self._stop.wait(5)
+
+    def _listen(self):
+        raw = self.engine.raw_connection()
+        raw.detach()  # keep it out of the request pool
+        conn = raw.driver_connection
+        try:
+            conn.autocommit = True
+            cursor = conn.cursor()
+            for channel in _handlers:
+                cursor.execute(f"LISTEN {channel}")
+            while not self._stop.is_set():
+                if select_module.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    message = conn.notifies.pop(0)
+                    handler = _handlers.get(message.channel)
+                    if handler:
+                        handler(message.payload)
+        finally:
+            raw.close()
+
+def start_listener(engine):
+    global _listener
+    if engine.dialect.name != "postgresql" or engine.dialect.driver != "psycopg2":
+        return None
+    _listener = Listener(engine)
+    _listener.start()
+    return _listener
+
+def stop_listener():
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
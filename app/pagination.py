@@ -0,0 +1,29 @@
+import base64
+from fastapi import Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+def paginate(query, pk, skip: int = 0, limit: int = 100, cursor: str = None):
+    # keyset on the primary key when a cursor is given, offset only as the legacy mode
+    query = query.order_by(pk)
+    if cursor:
+        query = query.filter(pk > decode_cursor(cursor))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def set_next_cursor(response: Response, items, limit: int):
+    # a full page means there may be more rows after the last id
+    if items and len(items) == limit:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["id"] if isinstance(last, dict) else last.id)
+    return items
@@ -0,0 +1,41 @@
+import time
+from http.cookies import SimpleCookie
+from .config import settings
+from .database import READ_METHODS
+
+COOKIE_NAME = "db_primary_until"
+
+def _pinned_until(scope) -> float:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(COOKIE_NAME)
+            if morsel is not None:
+                try:
+                    return float(morsel.value)
+                except ValueError:
+                    return 0.0
+    return 0.0
+
+class ReadYourWritesMiddleware:
+    # a client that just wrote (e.g. POST /bookings/) reads from the primary until replicas have caught up;
+    # reads set request.state.read_from_primary, which get_db checks before picking a replica
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if scope["method"] in READ_METHODS:
+            if _pinned_until(scope) > time.time():
+                scope.setdefault("state", {})["read_from_primary"] = True
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + settings.READ_YOUR_WRITES_SECONDS
+                cookie = (f"{COOKIE_NAME}={until:.3f}; Max-Age={settings.READ_YOUR_WRITES_SECONDS}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,7 @@
+import orjson
+from fastapi import Response
+
+def json_response(content) -> Response:
+    # content must already have the route's response_model shape (plain dicts built from SQL rows);
+    # returning a Response makes FastAPI skip validating and encoding it a second time
+    return Response(orjson.dumps(content), media_type="application/json")
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+from .. import schemas, crud
+from ..database import get_db
+from ..pagination import set_next_cursor
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/stats", response_model=schemas.FleetStats)
+def fleet_stats(from_date: Optional[date] = None, to_date: Optional[date] = None, db: Session = Depends(get_db)):
+    # seats sold per day and revenue / load factor per route, last 30 days by default
+    to_date = to_date or date.today()
+    from_date = from_date or to_date - timedelta(days=30)
+    if from_date > to_date:
+        raise HTTPException(status_code=400, detail="from_date must not be after to_date")
+    return crud.get_fleet_stats(db, from_date, to_date)
+
+@router.post("/stats/refresh")
+def refresh_stats(db: Session = Depends(get_db)):
+    # the sweeper does this periodically; useful right after bulk imports
+    return {"days_refreshed": crud.refresh_route_stats(db)}
+
+@router.get("/stats/schedules", response_model=list[schemas.ScheduleLoad])
+def schedule_loads(response: Response, travel_date: date, skip: int = 0, limit: int = 100,
+                   cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    # live per-schedule counters, no summary involved
+    try:
+        loads = crud.get_schedule_loads(db, travel_date, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return set_next_cursor(response, loads, limit)
@@ -1,113 +1,143 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
 from sqlalchemy.orm import Session
-from .. import schemas, crud, models
-from ..database import get_db
+from .. import schemas, crud, idempotency, tickets
+from ..database import get_db, get_async_db
+from ..config import settings
+from ..pagination import set_next_cursor
+from ..export import stream_rows
+from ..responses import json_response
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
-@router.post("/", response_model=schemas.BookingResponse)
-def create_booking(payload: schemas.BookingCreate, db: Session = Depends(get_db)):
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from .. import crud_async
+
+    @router.post("/", response_model=schemas.BookingResponse)
+    async def create_booking(payload: schemas.BookingCreate, db: AsyncSession = Depends(get_async_db),
+                             idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER)):
+        async def execute():
+            try:
+                booking = await crud_async.create_booking(db, payload)
+            except crud.SeatsChanged as e:
+                raise HTTPException(status_code=409, detail=str(e))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return crud.serialize_booking(booking)
+        if idempotency_key:
+            return await idempotency.run_async(db, "bookings", idempotency_key, payload,
+                                               schemas.BookingResponse, execute)
+        return await execute()
+else:
+    @router.post("/", response_model=schemas.BookingResponse)
+    def create_booking(payload: schemas.BookingCreate, db: Session = Depends(get_db),
+                       idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER)):
+        def execute():
+            try:
+                booking = crud.create_booking(db, payload)
+            except crud.SeatsChanged as e:
+                raise HTTPException(status_code=409, detail=str(e))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return crud.serialize_booking(booking)
+        if idempotency_key:
+            return idempotency.run(db, "bookings", idempotency_key, payload, schemas.BookingResponse, execute)
+        return execute()
+
+@router.post("/batch", response_model=schemas.BookingBatchResponse)
+def create_bookings_batch(payload: schemas.BookingBatchCreate, db: Session = Depends(get_db),
+                          idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER)):
+    def execute():
+        if not payload.legs:
+            raise HTTPException(status_code=400, detail="At least one leg is required")
+        try:
+            bookings = crud.create_bookings_batch(db, payload.legs)
+        except crud.SeatsChanged as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {
+            "bookings": [crud.serialize_booking(b) for b in bookings],
+            "total_fare": sum(b.total_fare for b in bookings),
+        }
+    if idempotency_key:
+        return idempotency.run(db, "bookings_batch", idempotency_key, payload,
+                               schemas.BookingBatchResponse, execute)
+    return execute()
+
+@router.post("/cancel", response_model=schemas.BookingCancelResponse)
+def cancel_bookings(payload: schemas.BookingCancel, db: Session = Depends(get_db)):
+    if not payload.booking_ids and payload.schedule_id is None:
+        raise HTTPException(status_code=400, detail="booking_ids or schedule_id is required")
+    try:
+        cancelled, released = crud.cancel_bookings(db, booking_ids=payload.booking_ids, schedule_id=payload.schedule_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"cancelled": cancelled, "seats_released": released}
+
+@router.get("/", response_model=list[schemas.BookingSummary])
+def list_bookings(skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                  user_id: Optional[int] = None, schedule_id: Optional[int] = None, status: Optional[str] = None,
+                  from_date: Optional[date] = None, to_date: Optional[date] = None,
+                  db: Session = Depends(get_db)):
     try:
-        booking = crud.create_booking(db, payload)
+        bookings = crud.get_bookings(db, skip=skip, limit=limit, cursor=cursor, user_id=user_id,
+                                     schedule_id=schedule_id, status=status, from_date=from_date, to_date=to_date,
+                                     rows=True)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    # convert booking to response schema
-    # build seats list
-    seats_resp = []
-    for bs in booking.seats:
-        seats_resp.append({
-            "id": bs.id,
-            "seat_id": bs.seat_id,
-            "seat_number": bs.seat.seat_number
-        })
-    return {
-        "id": booking.id,
-        "user_id": booking.user_id,
-        "schedule_id": booking.schedule_id,
-        "passenger_name": booking.passenger_name,
-        "passenger_phone": booking.passenger_phone,
-        "total_fare": booking.total_fare,
-        "booking_status": booking.booking_status,
-        "seats": seats_resp,
-        "qr_code": booking.qr_code
-    }
+    response = json_response(bookings)
+    set_next_cursor(response, bookings, limit)
+    return response
 
-@router.get("/", response_model=list[schemas.BookingResponse])
-def list_bookings(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    bookings = crud.get_bookings(db, skip=skip, limit=limit)
-    result = []
-    for booking in bookings:
-        seats_resp = []
-        for bs in booking.seats:
-            seats_resp.append({
-                "id": bs.id,
-                "seat_id": bs.seat_id,
-                "seat_number": bs.seat.seat_number
-            })
-        result.append({
-            "id": booking.id,
-            "user_id": booking.user_id,
-            "schedule_id": booking.schedule_id,
-            "passenger_name": booking.passenger_name,
-            "passenger_phone": booking.passenger_phone,
-            "total_fare": booking.total_fare,
-            "booking_status": booking.booking_status,
-            "seats": seats_resp,
-            "qr_code": booking.qr_code
-        })
-    return result
+# since is the last booking id already pulled, so an incremental pull only returns NEW bookings:
+# later changes to pulled rows (e.g. cancellations) are not re-sent, and reconciling totals needs a
+# periodic full pull (since=0); declared above /{booking_id}
+@router.get("/export")
+def export_bookings(since: int = 0, format: Literal["ndjson", "csv"] = "ndjson", db: Session = Depends(get_db)):
+    rows = crud.iter_booking_export(db, since)
+    return stream_rows(rows, format, crud.BOOKING_EXPORT_COLUMNS, "bookings")
 
 @router.get("/{booking_id}", response_model=schemas.BookingResponse)
 def get_booking(booking_id: int, db: Session = Depends(get_db)):
-    booking = db.query(models.Booking).filter_by(id=booking_id).first()
+    booking = crud.get_booking(db, booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
-    seats_resp = []
-    for bs in booking.seats:
-        seats_resp.append({
-            "id": bs.id,
-            "seat_id": bs.seat_id,
-            "seat_number": bs.seat.seat_number
-        })
-    return {
-        "id": booking.id,
-        "user_id": booking.user_id,
-        "schedule_id": booking.schedule_id,
-        "passenger_name": booking.passenger_name,
-        "passenger_phone": booking.passenger_phone,
-        "total_fare": booking.total_fare,
-        "booking_status": booking.booking_status,
-        "seats": seats_resp,
-        "qr_code": booking.qr_code
-    }
+    return crud.serialize_booking(booking)
+
+@router.get("/{booking_id}/ticket.png", response_class=Response,
+            responses={200: {"content": {"image/png": {}}}, 304: {"description": "Not modified"}})
+def booking_ticket(booking_id: int, db: Session = Depends(get_db),
+                   if_none_match: Optional[str] = Header(None)):
+    # rendered on first request and cached by payload; revalidation skips rendering and the cache
+    schedule_id = crud.get_booking_schedule_id(db, booking_id)
+    if schedule_id is None:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    ticket = tickets.payload(booking_id, schedule_id)
+    headers = {"ETag": tickets.etag(ticket), "Cache-Control": "private, max-age=86400"}
+    if tickets.not_modified(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(tickets.ticket_png(ticket), media_type="image/png", headers=headers)
 
 @router.put("/{booking_id}", response_model=schemas.BookingResponse)
 def update_booking(booking_id: int, status: str, db: Session = Depends(get_db)):
-    booking = crud.update_booking_status(db, booking_id, status)
+    try:
+        booking = crud.update_booking_status(db, booking_id, status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
-    seats_resp = []
-    for bs in booking.seats:
-        seats_resp.append({
-            "id": bs.id,
-            "seat_id": bs.seat_id,
-            "seat_number": bs.seat.seat_number
-        })
-    return {
-        "id": booking.id,
-        "user_id": booking.user_id,
-        "schedule_id": booking.schedule_id,
-        "passenger_name": booking.passenger_name,
-        "passenger_phone": booking.passenger_phone,
-        "total_fare": booking.total_fare,
-        "booking_status": booking.booking_status,
-        "seats": seats_resp,
-        "qr_code": booking.qr_code
-    }
+    return crud.serialize_booking(booking)
 
 @router.delete("/{booking_id}")
 def delete_booking(booking_id: int, db: Session = Depends(get_db)):
-    success = crud.delete_booking(db, booking_id)
+    # cancels rather than deletes; the booking stays visible with status CANCELLED
+    try:
+        success = crud.delete_booking(db, booking_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not success:
         raise HTTPException(status_code=404, detail="Booking not found")
-    return {"message": "Booking deleted successfully"}
+    return {"message": "Booking cancelled successfully"}
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from .. import schemas, crud
+from ..catalogue import catalogue
 from ..database import get_db
+from ..pagination import set_next_cursor
 
 router = APIRouter(prefix="/buses", tags=["buses"])
 
@@ -10,12 +13,17 @@ def create_bus(bus: schemas.BusCreate, db: Session = Depends(get_db)):
     return crud.create_bus(db, bus)
 
 @router.get("/", response_model=list[schemas.BusResponse])
-def list_buses(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
-    return crud.get_buses(db, skip=skip, limit=limit)
+def list_buses(response: Response, skip: int = 0, limit: int = 50, cursor: Optional[str] = None,
+               source: Optional[str] = None, destination: Optional[str] = None, db: Session = Depends(get_db)):
+    try:
+        buses = crud.get_buses(db, skip=skip, limit=limit, cursor=cursor, source=source, destination=destination)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return set_next_cursor(response, buses, limit)
 
 @router.get("/{bus_id}", response_model=schemas.BusResponse)
 def get_bus(bus_id: int, db: Session = Depends(get_db)):
-    bus = crud.get_bus(db, bus_id)
+    bus = catalogue.bus(db, bus_id)
     if not bus:
         raise HTTPException(status_code=404, detail="Bus not found")
     return bus
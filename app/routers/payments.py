@@ -1,21 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, Header
 from sqlalchemy.orm import Session
-from .. import schemas, crud
+from .. import schemas, crud, idempotency
 from ..database import get_db
+from ..pagination import set_next_cursor
+from ..export import stream_rows
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
 @router.post("/", response_model=schemas.PaymentResponse)
-def create_payment(payload: schemas.PaymentCreate, db: Session = Depends(get_db)):
+def create_payment(payload: schemas.PaymentCreate, db: Session = Depends(get_db),
+                   idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER)):
+    def execute():
+        try:
+            pay = crud.create_payment(db, payload)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return pay
+    if idempotency_key:
+        return idempotency.run(db, "payments", idempotency_key, payload, schemas.PaymentResponse, execute)
+    return execute()
+
+@router.get("/", response_model=list[schemas.PaymentResponse])
+def list_payments(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                  booking_id: Optional[int] = None, status: Optional[str] = None,
+                  db: Session = Depends(get_db)):
     try:
-        pay = crud.create_payment(db, payload)
+        payments = crud.get_payments(db, skip=skip, limit=limit, cursor=cursor, booking_id=booking_id, status=status)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    return pay
+    return set_next_cursor(response, payments, limit)
 
-@router.get("/", response_model=list[schemas.PaymentResponse])
-def list_payments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_payments(db, skip=skip, limit=limit)
+# since is the last payment id already pulled, so an incremental pull only returns NEW payments:
+# status updates to pulled rows are not re-sent, and reconciling totals needs a periodic full
+# pull (since=0); declared above /{payment_id}
+@router.get("/export")
+def export_payments(since: int = 0, format: Literal["ndjson", "csv"] = "ndjson", db: Session = Depends(get_db)):
+    rows = crud.iter_payment_export(db, since)
+    return stream_rows(rows, format, crud.PAYMENT_EXPORT_COLUMNS, "payments")
 
 @router.get("/{payment_id}", response_model=schemas.PaymentResponse)
 def get_payment(payment_id: int, db: Session = Depends(get_db)):
@@ -1,41 +1,108 @@
-from fastapi import APIRouter, Depends, HTTPException
+import codecs
+import csv
+from datetime import date, datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from .. import schemas, crud, models
-from ..database import get_db
+from .. import schemas, crud
+from ..database import get_db, get_async_db
+from ..pagination import set_next_cursor
+from ..config import settings
+from ..catalogue import catalogue
+from ..responses import json_response
 
 router = APIRouter(prefix="/schedules", tags=["schedules"])
 
 @router.post("/", response_model=schemas.ScheduleResponse)
 def create_schedule(schedule: schemas.ScheduleCreate, db: Session = Depends(get_db)):
     # ensure bus exists
-    bus = db.query(models.Bus).filter_by(id=schedule.bus_id).first()
+    bus = catalogue.bus(db, schedule.bus_id)
     if not bus:
         raise HTTPException(status_code=404, detail="Bus not found")
     s = crud.create_schedule(db, schedule)
     return s
 
+def _expand_rules(rules):
+    for i, rule in enumerate(rules, start=1):
+        try:
+            for item in crud.expand_schedule_rule(rule):
+                yield i, item
+        except ValueError as e:
+            yield i, str(e)
+
+def _read_csv(file):
+    # streamed row by row; columns match ScheduleCreate
+    reader = csv.DictReader(codecs.iterdecode(file, "utf-8-sig"))
+    for row in reader:
+        try:
+            yield reader.line_num, schemas.ScheduleCreate(**{k: v for k, v in row.items() if v not in (None, "")})
+        except ValidationError as e:
+            yield reader.line_num, "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+
+@router.post("/import", response_model=schemas.ScheduleImportResponse)
+def import_schedules(payload: schemas.ScheduleImport, db: Session = Depends(get_db)):
+    created, errors = crud.import_schedules(
+        db, _expand_rules(payload.rules), payload.generate_seats,
+        use_map=settings.SEAT_INVENTORY == "map"
+    )
+    return {"created": created, "errors": errors}
+
+@router.post("/import/csv", response_model=schemas.ScheduleImportResponse)
+def import_schedules_csv(file: UploadFile = File(...), generate_seats: bool = False, db: Session = Depends(get_db)):
+    created, errors = crud.import_schedules(
+        db, _read_csv(file.file), generate_seats,
+        use_map=settings.SEAT_INVENTORY == "map"
+    )
+    return {"created": created, "errors": errors}
+
 @router.get("/", response_model=list[schemas.ScheduleResponse])
-def list_schedules(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_schedules(db, skip=skip, limit=limit)
+def list_schedules(skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                   bus_id: Optional[int] = None, status: Optional[str] = None,
+                   from_date: Optional[date] = None, to_date: Optional[date] = None,
+                   db: Session = Depends(get_db)):
+    try:
+        schedules = crud.get_schedules(db, skip=skip, limit=limit, cursor=cursor, bus_id=bus_id,
+                                       status=status, from_date=from_date, to_date=to_date, rows=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response = json_response(schedules)
+    set_next_cursor(response, schedules, limit)
+    return response
+
+def _parse_travel_date(travel_date: str):
+    # travel_date expected as YYYY-MM-DD string
+    try:
+        return datetime.strptime(travel_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format (YYYY-MM-DD)")
+
+# the /search routes must stay above /{schedule_id}, otherwise "search" is matched as an id
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from .. import crud_async
+
+    @router.get("/search", response_model=list[schemas.ScheduleSearchResult])
+    async def search_schedules(source: str, destination: str, travel_date: str,
+                               db: AsyncSession = Depends(get_async_db)):
+        d = _parse_travel_date(travel_date)
+        return json_response(await crud_async.get_schedules_by_route(db, source, destination, d))
+else:
+    @router.get("/search", response_model=list[schemas.ScheduleSearchResult])
+    def search_schedules(source: str, destination: str, travel_date: str, db: Session = Depends(get_db)):
+        d = _parse_travel_date(travel_date)
+        results = crud.get_schedules_by_route(db, source, destination, d)
+        return json_response(results)
 
 @router.get("/{schedule_id}", response_model=schemas.ScheduleResponse)
 def get_schedule(schedule_id: int, db: Session = Depends(get_db)):
-    schedule = crud.get_schedule(db, schedule_id)
+    schedule = catalogue.schedule(db, schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
     return schedule
 
-@router.get("/search", response_model=list[schemas.ScheduleResponse])
-def search_schedules(source: str, destination: str, travel_date: str, db: Session = Depends(get_db)):
-    # travel_date expected as YYYY-MM-DD string
-    from datetime import datetime
-    try:
-        d = datetime.strptime(travel_date, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format (YYYY-MM-DD)")
-    results = crud.get_schedules_by_route(db, source, destination, d)
-    return results
-
 @router.put("/{schedule_id}", response_model=schemas.ScheduleResponse)
 def update_schedule(schedule_id: int, schedule: schemas.ScheduleCreate, db: Session = Depends(get_db)):
     updated_schedule = crud.update_schedule(db, schedule_id, schedule)
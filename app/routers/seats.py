@@ -1,29 +1,129 @@
+import asyncio
+import json
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from .. import schemas, crud, models
-from ..database import get_db
+from ..database import get_db, get_async_db, SessionLocal
+from ..config import settings
+from ..catalogue import catalogue
+from ..responses import json_response
+from ..seat_stream import broadcaster
 
 router = APIRouter(prefix="/seats", tags=["seats"])
 
+@router.post("/generate", response_model=schemas.SeatGenerateBulkResponse)
+def generate_seats_bulk(payload: schemas.SeatGenerateBulk, db: Session = Depends(get_db)):
+    if not payload.schedule_ids and not (payload.from_date or payload.to_date):
+        raise HTTPException(status_code=400, detail="Provide schedule_ids or a date range")
+    # schedules that already have seats are skipped
+    schedule_ids, seats_created = crud.generate_seats_bulk(
+        db, payload.schedule_ids, payload.from_date, payload.to_date,
+        use_map=settings.SEAT_INVENTORY == "map"
+    )
+    return {"schedule_ids": schedule_ids, "seats_created": seats_created}
+
+@router.post("/hold", response_model=schemas.SeatHoldResponse)
+def hold_seats(payload: schemas.SeatHoldCreate, db: Session = Depends(get_db)):
+    minutes = settings.SEAT_HOLD_MINUTES if payload.minutes is None else payload.minutes
+    # clients may shorten a hold, never extend it past the configured TTL
+    if not 0 < minutes <= settings.SEAT_HOLD_MINUTES:
+        raise HTTPException(status_code=400, detail=f"Hold minutes must be between 1 and {settings.SEAT_HOLD_MINUTES}")
+    try:
+        hold = crud.create_hold(db, payload, minutes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return crud.hold_response(hold)
+
+@router.delete("/hold/{token}")
+def release_hold(token: str, db: Session = Depends(get_db)):
+    try:
+        success = crud.release_hold(db, token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not success:
+        raise HTTPException(status_code=404, detail="Hold not found")
+    return {"message": "Hold released successfully"}
+
 @router.post("/generate/{schedule_id}", response_model=list[schemas.SeatResponse])
 def generate_seats(schedule_id: int, db: Session = Depends(get_db)):
     schedule = db.query(models.Schedule).filter_by(id=schedule_id).first()
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
+    if schedule.seat_map is not None:
+        return crud.seat_map_seats(schedule, only_available=False)
     # if seats exist already, return them
     existing = db.query(models.Seat).filter_by(schedule_id=schedule_id).all()
     if existing:
         return existing
-    created = crud.generate_seats_for_schedule(db, schedule_id, schedule.bus.total_seats)
+    total_seats = catalogue.bus(db, schedule.bus_id).total_seats
+    if settings.SEAT_INVENTORY == "map":
+        crud.init_seat_map(db, schedule, total_seats)
+        return crud.seat_map_seats(schedule, only_available=False)
+    created = crud.generate_seats_for_schedule(db, schedule_id, total_seats)
     return created
 
-@router.get("/available/{schedule_id}", response_model=list[schemas.SeatResponse])
-def available_seats(schedule_id: int, db: Session = Depends(get_db)):
-    schedule = db.query(models.Schedule).filter_by(id=schedule_id).first()
-    if not schedule:
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from .. import crud_async
+
+    @router.get("/available/{schedule_id}", response_model=list[schemas.SeatResponse])
+    async def available_seats(schedule_id: int, db: AsyncSession = Depends(get_async_db)):
+        schedule = await crud_async.get_schedule(db, schedule_id)
+        if not schedule:
+            raise HTTPException(status_code=404, detail="Schedule not found")
+        return await crud_async.get_available_seats(db, schedule)
+else:
+    @router.get("/available/{schedule_id}", response_model=list[schemas.SeatResponse])
+    def available_seats(schedule_id: int, db: Session = Depends(get_db)):
+        schedule = db.query(models.Schedule).filter_by(id=schedule_id).first()
+        if not schedule:
+            raise HTTPException(status_code=404, detail="Schedule not found")
+        if schedule.seat_map is not None:
+            return json_response(crud.seat_map_seats(schedule))
+        return json_response(crud.get_available_seat_rows(db, schedule_id))
+
+def _seat_snapshot(schedule_id: int):
+    # own short-lived session: a request-scoped one would pin a connection for the whole stream
+    db = SessionLocal()
+    try:
+        return crud.seat_availability(db, schedule_id)
+    finally:
+        db.close()
+
+def _sse(event: str, data: dict):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.get("/stream/{schedule_id}")
+async def stream_seats(schedule_id: int):
+    # server-sent events: a snapshot of every seat, then deltas as seats are booked, held or released;
+    # a "resync" event means deltas were lost and the client should reconnect
+    queue = broadcaster.subscribe(schedule_id)  # before the snapshot, so no change falls in between
+    try:
+        snapshot = await run_in_threadpool(_seat_snapshot, schedule_id)
+    except Exception:
+        broadcaster.unsubscribe(schedule_id, queue)
+        raise
+    if snapshot is None:
+        broadcaster.unsubscribe(schedule_id, queue)
         raise HTTPException(status_code=404, detail="Schedule not found")
-    seats = crud.get_available_seats(db, schedule_id)
-    return seats
+
+    async def events():
+        try:
+            yield _sse("snapshot", {"schedule_id": schedule_id, "seats": snapshot})
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), settings.SEAT_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(message["type"], message)
+        finally:
+            broadcaster.unsubscribe(schedule_id, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/{seat_id}", response_model=schemas.SeatResponse)
 def get_seat(seat_id: int, db: Session = Depends(get_db)):
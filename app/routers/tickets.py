@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from .. import schemas
+from ..boarding import index
+from ..catalogue import catalogue
+from ..database import get_db
+
+router = APIRouter(prefix="/tickets", tags=["tickets"])
+
+# both endpoints answer from the in-memory boarding manifests; the session only connects to load one
+
+@router.post("/verify", response_model=schemas.TicketVerification)
+def verify_ticket(payload: schemas.TicketVerify, db: Session = Depends(get_db)):
+    return index.verify(db, [payload.ticket], schedule_id=payload.schedule_id)[0]
+
+@router.post("/verify/batch", response_model=schemas.ManifestVerification)
+def verify_manifest(payload: schemas.ManifestVerify, db: Session = Depends(get_db)):
+    if catalogue.schedule(db, payload.schedule_id) is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    results = index.verify(db, payload.tickets, schedule_id=payload.schedule_id)
+    boarded = sum(1 for r in results if r["valid"])
+    return {"schedule_id": payload.schedule_id, "boarded": boarded, "rejected": len(results) - boarded,
+            "results": results}
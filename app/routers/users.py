@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from .. import schemas, crud
 from ..database import get_db
+from ..pagination import set_next_cursor
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -11,8 +13,13 @@ def create_user(payload: schemas.UserCreate, db: Session = Depends(get_db)):
     return user
 
 @router.get("/", response_model=list[schemas.UserResponse])
-def list_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_users(db, skip=skip, limit=limit)
+def list_users(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+               db: Session = Depends(get_db)):
+    try:
+        users = crud.get_users(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return set_next_cursor(response, users, limit)
 
 @router.get("/{user_id}", response_model=schemas.UserResponse)
 def get_user(user_id: int, db: Session = Depends(get_db)):
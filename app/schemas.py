@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
-from datetime import date, time
+from datetime import date, time, datetime
 
 # USERS
 class UserBase(BaseModel):
@@ -47,6 +47,38 @@ class ScheduleResponse(ScheduleBase):
     class Config:
         from_attributes = True
 
+class BusSummary(BaseModel):
+    id: int
+    bus_number: str
+    operator_name: str
+    bus_type: str
+
+class ScheduleSearchResult(ScheduleResponse):
+    bus: BusSummary
+    available_seats: int
+
+class ScheduleRule(BaseModel):
+    bus_id: int
+    days_of_week: List[int]  # 0 = Monday ... 6 = Sunday
+    start_date: date
+    end_date: date
+    departure_time: time
+    arrival_time: time
+    fare: float = 0.0
+    status: str = "active"
+
+class ScheduleImport(BaseModel):
+    rules: List[ScheduleRule]
+    generate_seats: bool = False
+
+class ScheduleImportError(BaseModel):
+    row: int  # rule index or CSV line, 1-based
+    error: str
+
+class ScheduleImportResponse(BaseModel):
+    created: int
+    errors: List[ScheduleImportError] = []
+
 # SEATS
 class SeatBase(BaseModel):
     seat_number: int
@@ -56,15 +88,38 @@ class SeatCreate(SeatBase):
     schedule_id: int
 
 class SeatResponse(SeatBase):
-    id: int
+    id: Optional[int] = None  # None for schedules using the compact seat map
     schedule_id: int
     class Config:
         from_attributes = True
 
+class SeatGenerateBulk(BaseModel):
+    schedule_ids: List[int] = []
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+
+class SeatGenerateBulkResponse(BaseModel):
+    schedule_ids: List[int]  # schedules that got seats in this call
+    seats_created: int
+
+class SeatHoldCreate(BaseModel):
+    schedule_id: int
+    seat_ids: List[int] = []
+    seat_numbers: List[int] = []
+    minutes: Optional[int] = None  # 1..SEAT_HOLD_MINUTES, defaults to SEAT_HOLD_MINUTES
+
+class SeatHoldResponse(BaseModel):
+    id: int
+    token: str
+    schedule_id: int
+    seat_numbers: List[int]
+    expires_at: datetime
+    status: str
+
 # BOOKING SEAT
 class BookingSeatResponse(BaseModel):
     id: int
-    seat_id: int
+    seat_id: Optional[int] = None
     seat_number: int
     class Config:
         from_attributes = True
@@ -77,19 +132,63 @@ class BookingBase(BaseModel):
 class BookingCreate(BookingBase):
     user_id: Optional[int] = None
     schedule_id: int
-    seat_ids: List[int]  # chosen seat ids
+    seat_numbers: List[int] = []  # chosen seat numbers within schedule_id (preferred)
+    seat_ids: List[int] = []  # chosen seat ids; must belong to schedule_id
+    hold_token: Optional[str] = None  # confirm seats held through /seats/hold
 
-class BookingResponse(BookingBase):
+class BookingSummary(BookingBase):
     id: int
     user_id: Optional[int]
     schedule_id: int
     total_fare: float
     booking_status: str
     seats: List[BookingSeatResponse] = []
-    qr_code: Optional[str] = None
     class Config:
         from_attributes = True
 
+class BookingResponse(BookingSummary):
+    qr_code: Optional[str] = None  # signed ticket payload; the image is GET /bookings/{id}/ticket.png
+
+class BookingBatchCreate(BaseModel):
+    legs: List[BookingCreate]  # e.g. outbound and return, or a group split across buses
+
+class BookingBatchResponse(BaseModel):
+    bookings: List[BookingResponse]
+    total_fare: float
+
+class BookingCancel(BaseModel):
+    # either explicit bookings, a whole schedule (e.g. a breakdown), or both to narrow down
+    booking_ids: Optional[List[int]] = None
+    schedule_id: Optional[int] = None
+
+class BookingCancelResponse(BaseModel):
+    cancelled: List[int]
+    seats_released: int
+
+# TICKETS
+class TicketVerify(BaseModel):
+    ticket: str  # qr_code of the booking response
+    schedule_id: Optional[int] = None  # departure being boarded; tickets for other departures are rejected
+
+class ManifestVerify(BaseModel):
+    schedule_id: int
+    tickets: List[str]  # scanned in order, e.g. synced from a conductor's device after boarding offline
+
+class TicketVerification(BaseModel):
+    ticket: str
+    valid: bool
+    booking_id: Optional[int] = None
+    schedule_id: Optional[int] = None
+    status: Optional[str] = None
+    seats: List[int] = []
+    reason: Optional[str] = None
+
+class ManifestVerification(BaseModel):
+    schedule_id: int
+    boarded: int
+    rejected: int
+    results: List[TicketVerification]
+
 # PAYMENTS
 class PaymentBase(BaseModel):
     amount: float
@@ -105,3 +204,34 @@ class PaymentResponse(PaymentBase):
     transaction_id: Optional[str] = None
     class Config:
         from_attributes = True
+
+# ADMIN
+class StatsTotals(BaseModel):
+    schedules: int
+    seats_total: int
+    seats_sold: int
+    revenue: float
+    load_factor: float
+
+class DayStats(StatsTotals):
+    travel_date: date
+
+class RouteStats(StatsTotals):
+    source_stop: str
+    destination_stop: str
+
+class FleetStats(BaseModel):
+    days: List[DayStats]
+    routes: List[RouteStats]
+
+class ScheduleLoad(BaseModel):
+    id: int
+    travel_date: date
+    departure_time: time
+    bus_number: str
+    source_stop: str
+    destination_stop: str
+    seats_total: int
+    seats_sold: int
+    revenue: float
+    load_factor: float
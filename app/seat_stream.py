@@ -0,0 +1,104 @@
+import asyncio
+import json
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from . import notify
+
+NOTIFY_CHANNEL = "seat_availability"
+QUEUE_SIZE = 1000
+# pg_notify payloads are capped at 8000 bytes
+MAX_PAYLOAD = 7900
+_PENDING = "seat_events"
+
+class Broadcaster:
+    # fan-out of seat availability deltas to the stream subscribers of this worker
+    def __init__(self):
+        self._subscribers = {}  # schedule_id -> {queue: loop}
+        self._lock = threading.Lock()
+
+    def subscribe(self, schedule_id: int):
+        queue = asyncio.Queue(QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(schedule_id, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, schedule_id: int, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(schedule_id, {})
+            subscribers.pop(queue, None)
+            if not subscribers:
+                self._subscribers.pop(schedule_id, None)
+
+    def publish(self, message: dict):
+        # called from request threads, the sweeper and the notify listener
+        with self._lock:
+            targets = list(self._subscribers.get(message["schedule_id"], {}).items())
+        for queue, loop in targets:
+            loop.call_soon_threadsafe(_offer, queue, message)
+
+    def resync_all(self):
+        with self._lock:
+            schedule_ids = list(self._subscribers)
+        for schedule_id in schedule_ids:
+            self.publish({"type": "resync", "schedule_id": schedule_id})
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+def _offer(queue, message):
+    if queue.full():
+        # slow consumer: drop what it has not read and make it refetch
+        while not queue.empty():
+            queue.get_nowait()
+        message = {"type": "resync", "schedule_id": message["schedule_id"]}
+    queue.put_nowait(message)
+
+broadcaster = Broadcaster()
+
+def stage(db, schedule_id: int, seat_numbers, is_available: bool):
+    # queued on the session and only sent once its transaction commits
+    db.info.setdefault(_PENDING, []).append((schedule_id, seat_numbers, is_available))
+
+def _messages(pending):
+    # one delta per schedule; later changes to the same seat win
+    changes = {}
+    for schedule_id, seat_numbers, is_available in pending:
+        seats = changes.setdefault(schedule_id, {})
+        for n in seat_numbers:
+            seats[n] = is_available
+    return [
+        {"type": "delta", "schedule_id": schedule_id,
+         "seats": [{"seat_number": n, "is_available": a} for n, a in sorted(seats.items())]}
+        for schedule_id, seats in changes.items()
+    ]
+
+@event.listens_for(Session, "before_commit")
+def _notify_before_commit(session):
+    pending = session.info.get(_PENDING)
+    if pending and notify.listening():
+        for message in _messages(pending):
+            payload = json.dumps(message)
+            if len(payload) > MAX_PAYLOAD:
+                payload = json.dumps({"type": "resync", "schedule_id": message["schedule_id"]})
+            notify.send(session, NOTIFY_CHANNEL, payload)
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    pending = session.info.pop(_PENDING, None)
+    if pending and not notify.listening():
+        for message in _messages(pending):
+            broadcaster.publish(message)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING, None)
+
+def _on_notify(payload):
+    if payload is None:
+        broadcaster.resync_all()
+        return
+    broadcaster.publish(json.loads(payload))
+
+notify.register(NOTIFY_CHANNEL, _on_notify)
@@ -0,0 +1,101 @@
+import base64
+import hashlib
+import hmac
+import io
+import os
+import threading
+from collections import OrderedDict
+import segno
+from .config import settings
+
+TICKET_PREFIX = "LT1"
+
+def _sign(body: str) -> str:
+    digest = hmac.new(settings.TICKET_SIGNING_KEY.encode(), body.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:12]).decode()
+
+def payload(booking_id: int, schedule_id: int) -> str:
+    # what the QR code encodes; derived from ids on demand, so nothing is stored at booking time
+    body = f"{TICKET_PREFIX}.{booking_id}.{schedule_id}"
+    return f"{body}.{_sign(body)}"
+
+def parse(ticket: str):
+    # returns (booking_id, schedule_id) of a ticket issued by payload()
+    prefix, _, rest = ticket.partition(".")
+    body, _, signature = ticket.rpartition(".")
+    parts = rest.split(".")
+    if prefix != TICKET_PREFIX or len(parts) != 3 or not hmac.compare_digest(signature.encode(), _sign(body).encode()):
+        raise ValueError("Invalid ticket")
+    try:
+        return int(parts[0]), int(parts[1])
+    except ValueError:
+        raise ValueError("Invalid ticket")
+
+def content_key(ticket: str) -> str:
+    # the PNG is a pure function of the payload, so its hash names the cache entry and the ETag
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+def etag(ticket: str) -> str:
+    return f'"{content_key(ticket)[:32]}"'
+
+def not_modified(if_none_match, tag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in candidates or tag in candidates
+
+def render_png(ticket: str) -> bytes:
+    buf = io.BytesIO()
+    segno.make(ticket, error="m").save(buf, kind="png", scale=8, border=4)
+    return buf.getvalue()
+
+# rendered PNGs by content key, in front of the optional disk cache shared by workers
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+
+def _lru_get(key):
+    with _lru_lock:
+        png = _lru.get(key)
+        if png is not None:
+            _lru.move_to_end(key)
+        return png
+
+def _lru_put(key, png: bytes):
+    with _lru_lock:
+        _lru[key] = png
+        _lru.move_to_end(key)
+        while len(_lru) > settings.TICKET_CACHE_SIZE:
+            _lru.popitem(last=False)
+
+def _disk_path(key: str):
+    return os.path.join(settings.TICKET_CACHE_DIR, key[:2], f"{key}.png")
+
+def _disk_get(key: str):
+    try:
+        with open(_disk_path(key), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _disk_put(key: str, png: bytes):
+    path = _disk_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(png)
+        os.replace(tmp, path)  # readers never see a partial file
+    except OSError:
+        pass  # the cache is an optimisation; the image is still served
+
+def ticket_png(ticket: str) -> bytes:
+    key = content_key(ticket)
+    png = _lru_get(key)
+    if png is None and settings.TICKET_CACHE_DIR:
+        png = _disk_get(key)
+    if png is None:
+        png = render_png(ticket)
+        if settings.TICKET_CACHE_DIR:
+            _disk_put(key, png)
+    _lru_put(key, png)
+    return png
@@ -0,0 +1,68 @@
+"""Helpers shared by the benchmark scripts: in-process client, seeding and percentiles."""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def latency_summary(values):
+    return {
+        "n": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+    }
+
+DROP_TABLES_FLAG = "--i-know-this-drops-tables"
+
+def add_drop_tables_flag(parser):
+    parser.add_argument(DROP_TABLES_FLAG, dest="drop_tables", action="store_true",
+                        help="allow resetting a --url that is not a temporary SQLite file")
+
+def _is_throwaway(url) -> bool:
+    if url.get_backend_name() != "sqlite":
+        return False
+    if not url.database or url.database == ":memory:":
+        return True
+    tmp = os.path.realpath(tempfile.gettempdir())
+    return os.path.realpath(url.database).startswith(tmp + os.sep)
+
+def reset_database(drop_tables: bool = False):
+    # drops every table and migrates from scratch; anything but a temporary SQLite file needs the flag
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import MetaData
+    from app.database import engine
+    if not drop_tables and not _is_throwaway(engine.url):
+        sys.exit(f"refusing to drop every table in {engine.url.render_as_string(hide_password=True)}; "
+                 f"pass {DROP_TABLES_FLAG} if it is a scratch database")
+    existing = MetaData()
+    existing.reflect(bind=engine)
+    existing.drop_all(bind=engine)
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+def make_client(app):
+    # app errors (e.g. pool timeouts) become 500s and are counted instead of aborting the run
+    import httpx
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
+
+async def seed_schedule(c, n: int, seats: int, travel_date: str = "2030-01-01"):
+    bus = (await c.post("/buses/", json={
+        "bus_number": f"BENCH-{n}", "operator_name": "bench", "bus_type": "AC",
+        "source_stop": "A", "destination_stop": "B", "total_seats": seats,
+    })).json()
+    schedule = (await c.post("/schedules/", json={
+        "bus_id": bus["id"], "travel_date": travel_date, "departure_time": "08:00:00",
+        "arrival_time": "10:00:00", "fare": 10,
+    })).json()
+    await c.post(f"/seats/generate/{schedule['id']}")
+    return schedule["id"]
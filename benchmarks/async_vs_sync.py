@@ -0,0 +1,108 @@
+"""Compare p50/p99 latency of the sync and async (DB_ASYNC) request paths.
+
+Each mode runs in its own subprocess against a fresh database, driving the
+app in-process through httpx's ASGI transport with N concurrent clients that
+search, read available seats and book a seat.
+
+    python benchmarks/async_vs_sync.py --clients 500
+    python benchmarks/async_vs_sync.py --url postgresql+psycopg2://user:pw@localhost/bench --i-know-this-drops-tables
+
+Every table in the target database is dropped before each mode runs.
+
+Needs httpx, plus aiosqlite (SQLite) or asyncpg (Postgres) for the async mode.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import (
+    ROOT, DROP_TABLES_FLAG, add_drop_tables_flag, latency_summary, make_client, reset_database, seed_schedule
+)
+
+async def run_clients(clients: int, seats_per_bus: int, drop_tables: bool):
+    from app.main import app
+
+    reset_database(drop_tables)
+    async with make_client(app) as c:
+        buses = -(-clients // seats_per_bus)
+        schedule_ids = [await seed_schedule(c, i, seats_per_bus) for i in range(buses)]
+
+        latencies = {"search": [], "available": [], "book": []}
+        errors = 0
+
+        async def client(n: int):
+            nonlocal errors
+            schedule_id = schedule_ids[n % buses]
+            for name, call in (
+                ("search", lambda: c.get("/schedules/search", params={
+                    "source": "A", "destination": "B", "travel_date": "2030-01-01"})),
+                ("available", lambda: c.get(f"/seats/available/{schedule_id}")),
+            ):
+                start = time.perf_counter()
+                r = await call()
+                if r.status_code != 200:
+                    errors += 1
+                    return
+                latencies[name].append(time.perf_counter() - start)
+            seats = r.json()
+            if seats:
+                seat = seats[n % len(seats)]
+                body = {"passenger_name": f"p{n}", "passenger_phone": "0", "schedule_id": schedule_id,
+                        "seat_numbers": [seat["seat_number"]]}
+                start = time.perf_counter()
+                r = await c.post("/bookings/", json=body)
+                if r.status_code != 200:
+                    errors += 1
+                    return
+                latencies["book"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(n) for n in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    report = {"elapsed_s": round(elapsed, 3), "errors": errors}
+    for name, values in latencies.items():
+        if values:
+            report[name] = latency_summary(values)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--seats-per-bus", type=int, default=50)
+    parser.add_argument("--url", help="database URL (defaults to a temporary SQLite file)")
+    add_drop_tables_flag(parser)
+    parser.add_argument("--child", choices=["sync", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_clients(args.clients, args.seats_per_bus, args.drop_tables))))
+        return
+
+    results = {}
+    for mode in ("sync", "async"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DB_ASYNC=str(mode == "async"), SEARCH_CACHE_TTL="0",
+                       DATABASE_URL=args.url or f"sqlite:///{tmp}/bench.db")
+            env.setdefault("DB_POOL_TIMEOUT", "10")
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--clients", str(args.clients),
+                 "--seats-per-bus", str(args.seats_per_bus)] + ([DROP_TABLES_FLAG] if args.drop_tables else []),
+                env=env, cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    for mode, report in results.items():
+        print(f"{mode:>5}: {report['elapsed_s']}s total, {report['errors']} errors")
+        for name in ("search", "available", "book"):
+            if name in report:
+                r = report[name]
+                print(f"       {name:<10} n={r['n']:<5} p50={r['p50_ms']}ms p99={r['p99_ms']}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Race many users for the seats of one schedule and check nothing is sold twice.
+
+Drives the app in-process (httpx ASGI transport) with asyncio clients, all
+booking random seat sets on the same departure, then audits the database.
+Reports throughput, p50/p99 latency, conflicts, lock/deadlock errors and
+correctness. Exits non-zero if any seat was sold twice or inventory disagrees
+with bookings, so it can gate changes to app/crud.py.
+
+    python benchmarks/booking_contention.py --users 2000 --seats 50
+    python benchmarks/booking_contention.py --holds --inventory map --async
+    python benchmarks/booking_contention.py --url postgresql+psycopg2://user:pw@localhost/bench \
+        --i-know-this-drops-tables
+
+Every table in the target database is dropped first, so --url other than a
+temporary SQLite file needs --i-know-this-drops-tables. Without --url a
+temporary SQLite file is used; SQLite ignores FOR UPDATE and
+serialises writers, so lock errors are expected there and Postgres numbers are
+the ones to compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from _common import add_drop_tables_flag, latency_summary, make_client, reset_database, seed_schedule
+
+def classify(exc: Exception) -> str:
+    text = str(exc).lower()
+    if "deadlock" in text:
+        return "deadlock"
+    if "queuepool limit" in text:
+        return "pool_timeout"
+    if "lock" in text or "busy" in text:
+        return "lock_error"
+    if "serializ" in text:
+        return "serialization_failure"
+    return exc.__class__.__name__
+
+class ErrorTap:
+    # ASGI wrapper recording why requests failed with a 500
+    def __init__(self, app):
+        self.app = app
+        self.errors = Counter()
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.app(scope, receive, send)
+        except Exception as e:
+            self.errors[classify(e)] += 1
+            raise
+
+def audit(schedule_id: int):
+    from sqlalchemy import func
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        sold = [n for (n,) in db.query(
+            func.coalesce(models.BookingSeat.seat_number, models.Seat.seat_number)
+        ).join(models.Booking, models.Booking.id == models.BookingSeat.booking_id)
+         .outerjoin(models.Seat, models.Seat.id == models.BookingSeat.seat_id)
+         .filter(models.Booking.schedule_id == schedule_id, models.Booking.booking_status != "CANCELLED").all()]
+        counts = Counter(sold)
+        schedule = db.query(models.Schedule).filter_by(id=schedule_id).first()
+        if schedule.seat_map is not None:
+            free = {i for i, flag in enumerate(schedule.seat_map, start=1) if flag == "0"}
+        else:
+            free = {n for (n,) in db.query(models.Seat.seat_number).filter_by(schedule_id=schedule_id, is_available=True)}
+        return {
+            "seats_sold": len(counts),
+            "double_sold": sorted(n for n, c in counts.items() if c > 1),
+            "sold_but_free": sorted(set(counts) & free),
+        }
+    finally:
+        db.close()
+
+async def race(args):
+    from app.main import app
+
+    reset_database(args.drop_tables)
+    tapped = ErrorTap(app)
+    async with make_client(tapped) as c:
+        schedule_id = await seed_schedule(c, 0, args.seats)
+
+        rng = random.Random(args.seed)
+        wanted = [rng.sample(range(1, args.seats + 1), rng.randint(1, args.max_seats)) for _ in range(args.users)]
+        latencies, outcomes = [], Counter()
+        gate = asyncio.Semaphore(args.concurrency)
+
+        async def user(n: int):
+            numbers = wanted[n]
+            body = {"passenger_name": f"user{n}", "passenger_phone": "0", "schedule_id": schedule_id}
+            async with gate:
+                start = time.perf_counter()
+                if args.holds:
+                    r = await c.post("/seats/hold", json={"schedule_id": schedule_id, "seat_numbers": numbers})
+                    if r.status_code == 200:
+                        body["hold_token"] = r.json()["token"]
+                        r = await c.post("/bookings/", json=body)
+                else:
+                    r = await c.post("/bookings/", json=dict(body, seat_numbers=numbers))
+                latencies.append(time.perf_counter() - start)
+            outcomes[{200: "booked", 400: "conflict"}.get(r.status_code, f"http_{r.status_code}")] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(n) for n in range(args.users)))
+        elapsed = time.perf_counter() - start
+
+    report = {
+        "users": args.users,
+        "seats": args.seats,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.users / elapsed, 1),
+        "latency": latency_summary(latencies),
+        "outcomes": dict(outcomes),
+        "errors": dict(tapped.errors),
+    }
+    report.update(audit(schedule_id))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--seats", type=int, default=50)
+    parser.add_argument("--max-seats", type=int, default=3, help="seats per booking, 1..N")
+    parser.add_argument("--concurrency", type=int, default=100, help="requests in flight at once")
+    parser.add_argument("--holds", action="store_true", help="hold seats first, then confirm the hold")
+    parser.add_argument("--inventory", choices=["rows", "map"], default="rows")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="run with DB_ASYNC")
+    parser.add_argument("--url", help="database URL (defaults to a temporary SQLite file)")
+    add_drop_tables_flag(parser)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # settings are read at import time, so configure the environment before loading the app
+        os.environ["DATABASE_URL"] = args.url or f"sqlite:///{tmp}/contention.db"
+        os.environ["SEAT_INVENTORY"] = args.inventory
+        os.environ["DB_ASYNC"] = str(args.use_async)
+        os.environ.setdefault("DB_POOL_TIMEOUT", "10")
+        report = asyncio.run(race(args))
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        lat = report["latency"]
+        print(f"{report['users']} users, {report['seats']} seats: {report['elapsed_s']}s, "
+              f"{report['throughput_rps']} req/s, p50={lat['p50_ms']}ms p99={lat['p99_ms']}ms")
+        print(f"outcomes: {report['outcomes']}  errors: {report['errors'] or 'none'}")
+        print(f"seats sold: {report['seats_sold']}  double sold: {report['double_sold'] or 'none'}  "
+              f"sold but free: {report['sold_but_free'] or 'none'}")
+    sys.exit(1 if report["double_sold"] or report["sold_but_free"] else 0)
+
+if __name__ == "__main__":
+    main()
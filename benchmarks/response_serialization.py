@@ -0,0 +1,80 @@
+"""Per-endpoint latency of the large list responses, to compare serialization paths.
+
+Seeds one bus with many seats and bookings plus a batch of schedules into a
+temporary SQLite database (or DATABASE_URL, reset first with
+--i-know-this-drops-tables), then issues each GET sequentially (so the numbers
+reflect per-request CPU rather than contention) and reports p50/p99.
+
+    python benchmarks/response_serialization.py --save before.json
+    python benchmarks/response_serialization.py --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from _common import add_drop_tables_flag, latency_summary, make_client, reset_database, seed_schedule
+
+async def run(items: int, requests: int, drop_tables: bool):
+    from app.main import app
+
+    reset_database(drop_tables)
+    async with make_client(app) as c:
+        schedule_id = await seed_schedule(c, 0, items * 3)
+        for n in range(items):
+            body = {"passenger_name": f"p{n}", "passenger_phone": "0", "schedule_id": schedule_id,
+                    "seat_numbers": [2 * n + 1, 2 * n + 2]}
+            assert (await c.post("/bookings/", json=body)).status_code == 200
+        for n in range(1, items):
+            await seed_schedule(c, n, 4)
+
+        endpoints = {
+            "bookings": f"/bookings/?limit={items}",
+            "schedules": f"/schedules/?limit={items}",
+            "search": "/schedules/search?source=A&destination=B&travel_date=2030-01-01",
+            "available": f"/seats/available/{schedule_id}",
+        }
+        report = {}
+        for name, url in endpoints.items():
+            await c.get(url)  # warm-up
+            timings = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                r = await c.get(url)
+                timings.append(time.perf_counter() - start)
+                assert r.status_code == 200, (url, r.status_code)
+            report[name] = dict(latency_summary(timings), items=len(r.json()))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=200, help="bookings, schedules and free seats per list")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--save", help="write the report to this JSON file")
+    parser.add_argument("--compare", help="print p50 change against a saved report")
+    add_drop_tables_flag(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/bench.db")
+        os.environ.setdefault("SEARCH_CACHE_TTL", "0")
+        report = asyncio.run(run(args.items, args.requests, args.drop_tables))
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    for name, r in report.items():
+        line = f"{name:<10} items={r['items']:<5} p50={r['p50_ms']}ms p99={r['p99_ms']}ms"
+        if name in baseline:
+            before = baseline[name]["p50_ms"]
+            line += f"  (p50 was {before}ms, {(r['p50_ms'] - before) / before * 100:+.0f}%)"
+        print(line)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
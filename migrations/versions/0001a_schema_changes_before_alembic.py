@@ -0,0 +1,122 @@
+"""schema changes made before alembic
+
+Seat maps, seat holds, idempotency keys, booking seat numbers and the indexes
+for search, listing and pagination, added to the models before the schema
+was managed by migrations.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18 12:53:50.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('idempotency_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('request_hash', sa.String(), nullable=False),
+    sa.Column('response_status', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.Text(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'key', name='uq_idempotency_scope_key')
+    )
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.create_index('ix_idempotency_expires_at', ['expires_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_idempotency_keys_id'), ['id'], unique=False)
+
+    op.create_table('seat_holds',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(), nullable=False),
+    sa.Column('schedule_id', sa.Integer(), nullable=False),
+    sa.Column('seat_numbers', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['schedule_id'], ['schedules.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('token')
+    )
+    with op.batch_alter_table('seat_holds', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_seat_holds_id'), ['id'], unique=False)
+        batch_op.create_index('ix_seat_holds_status_expires', ['status', 'expires_at'], unique=False)
+
+    with op.batch_alter_table('booking_seats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seat_number', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('ix_bookings_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_bookings_schedule', ['schedule_id', 'id'], unique=False)
+        batch_op.create_index('ix_bookings_status', ['booking_status', 'id'], unique=False)
+        batch_op.create_index('ix_bookings_user', ['user_id', 'id'], unique=False)
+
+    with op.batch_alter_table('buses', schema=None) as batch_op:
+        batch_op.create_index('ix_buses_route', ['source_stop', 'destination_stop'], unique=False)
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index('ix_payments_booking', ['booking_id'], unique=False)
+        batch_op.create_index('ix_payments_status', ['status', 'id'], unique=False)
+
+    with op.batch_alter_table('schedules', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seat_map', sa.String(), nullable=True))
+        batch_op.create_index('ix_schedules_bus_date_status', ['bus_id', 'travel_date', 'status'], unique=False)
+        batch_op.create_index('ix_schedules_travel_date', ['travel_date', 'id'], unique=False)
+
+    with op.batch_alter_table('seats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('hold_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_seats_schedule_available', ['schedule_id', 'is_available'], unique=False)
+        batch_op.create_foreign_key('fk_seats_hold_id_seat_holds', 'seat_holds', ['hold_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('seats', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_seats_hold_id_seat_holds', type_='foreignkey')
+        batch_op.drop_index('ix_seats_schedule_available')
+        batch_op.drop_column('hold_id')
+
+    with op.batch_alter_table('schedules', schema=None) as batch_op:
+        batch_op.drop_index('ix_schedules_travel_date')
+        batch_op.drop_index('ix_schedules_bus_date_status')
+        batch_op.drop_column('seat_map')
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_payments_status')
+        batch_op.drop_index('ix_payments_booking')
+
+    with op.batch_alter_table('buses', schema=None) as batch_op:
+        batch_op.drop_index('ix_buses_route')
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_user')
+        batch_op.drop_index('ix_bookings_status')
+        batch_op.drop_index('ix_bookings_schedule')
+        batch_op.drop_index('ix_bookings_created_at')
+
+    with op.batch_alter_table('booking_seats', schema=None) as batch_op:
+        batch_op.drop_column('seat_number')
+
+    with op.batch_alter_table('seat_holds', schema=None) as batch_op:
+        batch_op.drop_index('ix_seat_holds_status_expires')
+        batch_op.drop_index(batch_op.f('ix_seat_holds_id'))
+
+    op.drop_table('seat_holds')
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_idempotency_keys_id'))
+        batch_op.drop_index('ix_idempotency_expires_at')
+
+    op.drop_table('idempotency_keys')
+    # ### end Alembic commands ###
@@ -0,0 +1,50 @@
+"""seat uniqueness and fk indexes
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-18 12:53:59.647120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('booking_seats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('active', sa.Boolean(), server_default=sa.true(), nullable=False))
+        batch_op.create_index('ix_booking_seats_booking', ['booking_id'], unique=False)
+
+    # seats of bookings cancelled before this revision are no longer held by them
+    op.execute(
+        "UPDATE booking_seats SET active = false "
+        "WHERE booking_id IN (SELECT id FROM bookings WHERE booking_status = 'CANCELLED')"
+    )
+    # fails if the data already contains a double sale or duplicate seat rows; resolve those first
+    op.create_index('uq_booking_seats_active_seat', 'booking_seats', ['seat_id'], unique=True,
+                    postgresql_where=sa.text('active'), sqlite_where=sa.text('active'))
+
+    with op.batch_alter_table('seats', schema=None) as batch_op:
+        batch_op.create_index('ix_seats_hold', ['hold_id'], unique=False)
+        batch_op.create_index('uq_seats_schedule_seat_number', ['schedule_id', 'seat_number'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('seats', schema=None) as batch_op:
+        batch_op.drop_index('uq_seats_schedule_seat_number')
+        batch_op.drop_index('ix_seats_hold')
+
+    op.drop_index('uq_booking_seats_active_seat', table_name='booking_seats')
+    with op.batch_alter_table('booking_seats', schema=None) as batch_op:
+        batch_op.drop_index('ix_booking_seats_booking')
+        batch_op.drop_column('active')
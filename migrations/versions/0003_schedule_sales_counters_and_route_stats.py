@@ -0,0 +1,66 @@
+"""schedule sales counters and route day stats
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 13:00:38.004330
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('route_day_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('travel_date', sa.Date(), nullable=False),
+    sa.Column('source_stop', sa.String(), nullable=False),
+    sa.Column('destination_stop', sa.String(), nullable=False),
+    sa.Column('schedules', sa.Integer(), nullable=False),
+    sa.Column('seats_total', sa.Integer(), nullable=False),
+    sa.Column('seats_sold', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('route_day_stats', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_route_day_stats_id'), ['id'], unique=False)
+        batch_op.create_index('uq_route_day_stats_day_route', ['travel_date', 'source_stop', 'destination_stop'], unique=True)
+
+    with op.batch_alter_table('schedules', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seats_sold', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('revenue', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('stats_dirty', sa.Boolean(), server_default=sa.true(), nullable=False))
+        batch_op.create_index('ix_schedules_stats_dirty', ['travel_date'], unique=False, postgresql_where=sa.text('stats_dirty'), sqlite_where=sa.text('stats_dirty'))
+
+    # counters start from what is already sold; every schedule is dirty so the first refresh fills route_day_stats
+    op.execute(
+        "UPDATE schedules SET "
+        "seats_sold = (SELECT count(*) FROM booking_seats bs JOIN bookings b ON b.id = bs.booking_id "
+        "WHERE b.schedule_id = schedules.id AND bs.active), "
+        "revenue = (SELECT coalesce(sum(total_fare), 0) FROM bookings "
+        "WHERE bookings.schedule_id = schedules.id AND booking_status != 'CANCELLED')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('schedules', schema=None) as batch_op:
+        batch_op.drop_index('ix_schedules_stats_dirty')
+        batch_op.drop_column('stats_dirty')
+        batch_op.drop_column('revenue')
+        batch_op.drop_column('seats_sold')
+
+    with op.batch_alter_table('route_day_stats', schema=None) as batch_op:
+        batch_op.drop_index('uq_route_day_stats_day_route')
+        batch_op.drop_index(batch_op.f('ix_route_day_stats_id'))
+
+    op.drop_table('route_day_stats')
@@ -0,0 +1,75 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app import idempotency, tickets
+from app.boarding import index as boarding_index
+from app.cache import search_cache
+from app.catalogue import catalogue
+from app.config import settings
+from app.database import Base, get_db
+from app.main import app
+
+@pytest.fixture
+def engine():
+    # one in-memory database per test, shared by every session through StaticPool
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+@pytest.fixture
+def client(session_factory):
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+    # process-wide caches must not leak rows between databases
+    for cache in (catalogue, search_cache, boarding_index):
+        cache.clear()
+    idempotency._lru.clear()
+    tickets._lru.clear()
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+@pytest.fixture(params=["rows", "map"])
+def inventory(request, monkeypatch):
+    # runs the test once on seat rows and once on the compact seat map
+    monkeypatch.setattr(settings, "SEAT_INVENTORY", request.param)
+    return request.param
+
+@pytest.fixture
+def seat_map(monkeypatch):
+    monkeypatch.setattr(settings, "SEAT_INVENTORY", "map")
+
+@pytest.fixture
+def count_queries(engine):
+    # count_queries() returns a context manager whose value is a list of the statements it saw
+    class Counter:
+        def __init__(self):
+            self.statements = []
+
+        def _record(self, conn, cursor, statement, *args):
+            self.statements.append(statement)
+
+        def __enter__(self):
+            event.listen(engine, "before_cursor_execute", self._record)
+            return self.statements
+
+        def __exit__(self, *exc):
+            event.remove(engine, "before_cursor_execute", self._record)
+    return Counter
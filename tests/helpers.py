@@ -0,0 +1,22 @@
+def create_schedule(client, seats=10, travel_date="2030-01-01", source="A", destination="B", fare=100,
+                    generate=True, bus_number=None):
+    bus = client.post("/buses/", json={
+        "bus_number": bus_number or f"B-{source}-{destination}-{travel_date}", "operator_name": "op",
+        "bus_type": "AC", "source_stop": source, "destination_stop": destination, "total_seats": seats,
+    }).json()
+    schedule = client.post("/schedules/", json={
+        "bus_id": bus["id"], "travel_date": travel_date, "departure_time": "10:00:00",
+        "arrival_time": "12:00:00", "fare": fare,
+    }).json()
+    if generate:
+        assert client.post(f"/seats/generate/{schedule['id']}").status_code == 200
+    return schedule["id"]
+
+def book(client, schedule_id, seat_numbers, **extra):
+    body = {"passenger_name": "p", "passenger_phone": "0", "schedule_id": schedule_id,
+            "seat_numbers": seat_numbers, **extra}
+    return client.post("/bookings/", json=body)
+
+def available_seats(client, schedule_id):
+    # sorted numbers of the free seats, whichever inventory the schedule uses
+    return sorted(s["seat_number"] for s in client.get(f"/seats/available/{schedule_id}").json())
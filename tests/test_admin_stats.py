@@ -0,0 +1,39 @@
+from tests.helpers import book, create_schedule
+
+RANGE = "from_date=2030-01-01&to_date=2030-01-31"
+
+def test_stats_come_from_the_refreshed_summary(client):
+    first = create_schedule(client, seats=4, fare=10)
+    second = create_schedule(client, seats=6, fare=20, bus_number="B-2")
+    create_schedule(client, seats=5, source="X", destination="Y", travel_date="2030-01-02")
+    book(client, first, [1, 2])
+    book(client, second, [1])
+
+    assert client.get(f"/admin/stats?{RANGE}").json() == {"days": [], "routes": []}
+    assert client.post("/admin/stats/refresh").json() == {"days_refreshed": 2}
+    stats = client.get(f"/admin/stats?{RANGE}").json()
+    day = stats["days"][0]
+    assert (day["travel_date"], day["schedules"], day["seats_total"], day["seats_sold"], day["revenue"]) == (
+        "2030-01-01", 2, 10, 3, 40)
+    assert day["load_factor"] == 0.3
+    assert [(r["source_stop"], r["seats_sold"]) for r in stats["routes"]] == [("A", 3), ("X", 0)]
+
+def test_refresh_only_recomputes_changed_days(client):
+    schedule_id = create_schedule(client, seats=4)
+    create_schedule(client, seats=4, travel_date="2030-01-02")
+    client.post("/admin/stats/refresh")
+    assert client.post("/admin/stats/refresh").json() == {"days_refreshed": 0}
+    booking_id = book(client, schedule_id, [1]).json()["id"]
+    client.delete(f"/bookings/{booking_id}")
+    assert client.post("/admin/stats/refresh").json() == {"days_refreshed": 1}
+    [day, _] = client.get(f"/admin/stats?{RANGE}").json()["days"]
+    assert (day["seats_sold"], day["revenue"]) == (0, 0)
+
+def test_schedule_loads_are_live(client):
+    schedule_id = create_schedule(client, seats=4, fare=15)
+    book(client, schedule_id, [1, 2, 3])
+    [load] = client.get("/admin/stats/schedules?travel_date=2030-01-01").json()
+    assert (load["id"], load["seats_sold"], load["revenue"], load["load_factor"]) == (schedule_id, 3, 45, 0.75)
+
+def test_inverted_range_is_rejected(client):
+    assert client.get("/admin/stats?from_date=2030-02-01&to_date=2030-01-01").status_code == 400
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
+from app import database
+from app.config import settings
+from benchmarks import _common
+
+@pytest.mark.parametrize("url, throwaway", [
+    ("sqlite://", True),
+    ("sqlite:///:memory:", True),
+    (f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench.db')}", True),
+    ("sqlite:///./locotranz.db", False),
+    ("postgresql+psycopg2://u:p@localhost/bench", False),
+])
+def test_only_temporary_sqlite_counts_as_throwaway(url, throwaway):
+    assert _common._is_throwaway(make_url(url)) is throwaway
+
+@pytest.fixture
+def target(monkeypatch):
+    # points the app and the migrations at url, as the benchmarks' --url does
+    def point_at(url):
+        engine = create_engine(url)
+        monkeypatch.setattr(settings, "DATABASE_URL", url)
+        monkeypatch.setattr(database, "engine", engine)
+        return engine
+    return point_at
+
+def test_reset_refuses_a_real_database_without_the_flag(target, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = target("sqlite:///./kept.db")
+    database.Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(_common.tempfile, "gettempdir", lambda: str(tmp_path / "elsewhere"))
+    with pytest.raises(SystemExit, match=_common.DROP_TABLES_FLAG):
+        _common.reset_database()
+    assert "bookings" in inspect(engine).get_table_names()
+
+def test_reset_migrates_a_temporary_database(target, tmp_path):
+    engine = target(f"sqlite:///{tmp_path / 'bench.db'}")
+    _common.reset_database()
+    tables = set(inspect(engine).get_table_names())
+    assert {"alembic_version", "bookings", "booking_seats", "schedules"} <= tables
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from app import models, tickets
+from app.boarding import index
+from tests.helpers import book, create_schedule
+
+def _verify(client, ticket, schedule_id=None):
+    return client.post("/tickets/verify", json={"ticket": ticket, "schedule_id": schedule_id}).json()
+
+def test_valid_ticket_reports_booking_and_seats(client):
+    schedule_id = create_schedule(client, seats=4)
+    booking = book(client, schedule_id, [3, 1]).json()
+    result = _verify(client, booking["qr_code"], schedule_id)
+    assert result["valid"] and result["booking_id"] == booking["id"]
+    assert (result["status"], result["seats"]) == ("CONFIRMED", [1, 3])
+
+def test_invalid_tickets_are_rejected_with_a_reason(client):
+    schedule_id = create_schedule(client, seats=4)
+    other = create_schedule(client, seats=4, source="X", destination="Y")
+    booking = book(client, schedule_id, [1]).json()
+    assert _verify(client, "forged")["reason"] == "Invalid ticket"
+    assert _verify(client, booking["qr_code"], other)["reason"] == "Ticket is for another departure"
+    assert _verify(client, tickets.payload(999, schedule_id))["reason"] == "Booking not found"
+    client.delete(f"/bookings/{booking['id']}")
+    assert _verify(client, booking["qr_code"])["reason"] == "Booking is cancelled"
+
+def test_batch_boards_each_booking_once(client):
+    schedule_id = create_schedule(client, seats=4)
+    first, second = (book(client, schedule_id, [n]).json()["qr_code"] for n in (1, 2))
+    r = client.post("/tickets/verify/batch", json={"schedule_id": schedule_id, "tickets": [first, second, first]})
+    body = r.json()
+    assert (body["boarded"], body["rejected"]) == (2, 1)
+    assert body["results"][2]["reason"] == "Ticket already scanned"
+    assert client.post("/tickets/verify/batch", json={"schedule_id": 999, "tickets": []}).status_code == 404
+
+def test_preloaded_departure_verifies_without_queries(client, db, count_queries):
+    schedule_id = create_schedule(client, seats=4)
+    ticket = book(client, schedule_id, [1]).json()["qr_code"]
+    departure = datetime.now() + timedelta(minutes=10)
+    db.query(models.Schedule).filter_by(id=schedule_id).update(
+        {"travel_date": departure.date(), "departure_time": departure.time().replace(microsecond=0)})
+    db.commit()
+    index.clear()
+    assert index.preload(db, minutes=30) == 1
+    with count_queries() as statements:
+        assert _verify(client, ticket, schedule_id)["valid"]
+    assert statements == []
+
+def test_booking_made_after_loading_is_found(client):
+    schedule_id = create_schedule(client, seats=4)
+    _verify(client, book(client, schedule_id, [1]).json()["qr_code"])
+    late = book(client, schedule_id, [2]).json()
+    result = _verify(client, late["qr_code"])
+    assert result["valid"] and result["seats"] == [2]
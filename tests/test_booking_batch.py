@@ -0,0 +1,28 @@
+from app import models
+from tests.helpers import available_seats, book, create_schedule
+
+def _leg(schedule_id, seat_numbers):
+    return {"passenger_name": "p", "passenger_phone": "0", "schedule_id": schedule_id, "seat_numbers": seat_numbers}
+
+def test_batch_books_every_leg_in_request_order(client):
+    outbound = create_schedule(client, seats=4, fare=30)
+    back = create_schedule(client, seats=4, fare=20, source="B", destination="A")
+    r = client.post("/bookings/batch", json={"legs": [_leg(back, [1]), _leg(outbound, [2, 3])]})
+    assert r.status_code == 200
+    body = r.json()
+    assert [b["schedule_id"] for b in body["bookings"]] == [back, outbound]
+    assert body["total_fare"] == 20 + 2 * 30
+    assert (available_seats(client, outbound), available_seats(client, back)) == ([1, 4], [2, 3, 4])
+
+def test_failing_leg_rolls_back_the_whole_batch(client, db):
+    outbound = create_schedule(client, seats=4)
+    back = create_schedule(client, seats=4, source="B", destination="A")
+    book(client, back, [1])
+    r = client.post("/bookings/batch", json={"legs": [_leg(outbound, [1]), _leg(back, [1])]})
+    assert r.status_code == 400
+    assert r.json()["detail"].startswith("Leg 2:")
+    assert available_seats(client, outbound) == [1, 2, 3, 4]
+    assert db.query(models.Booking).count() == 1
+
+def test_empty_batch_is_rejected(client):
+    assert client.post("/bookings/batch", json={"legs": []}).status_code == 400
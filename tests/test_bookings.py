@@ -0,0 +1,22 @@
+from tests.helpers import book, create_schedule
+
+def test_booking_list_query_count_does_not_grow_with_page_size(client, count_queries):
+    schedule_id = create_schedule(client, seats=60)
+    for n in range(25):
+        assert book(client, schedule_id, [2 * n + 1, 2 * n + 2]).status_code == 200
+
+    counts = {}
+    for limit in (5, 25):
+        with count_queries() as statements:
+            r = client.get(f"/bookings/?limit={limit}")
+        assert r.status_code == 200 and len(r.json()) == limit
+        counts[limit] = len(statements)
+    assert counts[5] == counts[25]
+
+def test_booking_list_matches_single_booking(client):
+    schedule_id = create_schedule(client)
+    booking_id = book(client, schedule_id, [3, 1]).json()["id"]
+    listed = client.get("/bookings/").json()[0]
+    single = client.get(f"/bookings/{booking_id}").json()
+    assert listed == {k: v for k, v in single.items() if k != "qr_code"}
+    assert sorted(s["seat_number"] for s in single["seats"]) == [1, 3]
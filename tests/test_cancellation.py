@@ -0,0 +1,35 @@
+from app import models
+from tests.helpers import available_seats, book, create_schedule
+
+def test_cancelling_a_schedule_releases_every_seat(client, db, inventory):
+    schedule_id = create_schedule(client, seats=6)
+    other = create_schedule(client, seats=6, source="X", destination="Y")
+    ids = [book(client, schedule_id, seats).json()["id"] for seats in ([1, 2], [3], [4, 5])]
+    book(client, other, [1])
+    r = client.post("/bookings/cancel", json={"schedule_id": schedule_id})
+    assert r.json() == {"cancelled": ids, "seats_released": 5}
+    assert available_seats(client, schedule_id) == [1, 2, 3, 4, 5, 6]
+    assert available_seats(client, other) == [2, 3, 4, 5, 6]
+    schedule = db.get(models.Schedule, schedule_id)
+    assert (schedule.seats_sold, schedule.revenue) == (0, 0)
+
+def test_cancelling_twice_releases_seats_once(client, inventory):
+    schedule_id = create_schedule(client, seats=4)
+    booking_id = book(client, schedule_id, [1, 2]).json()["id"]
+    assert client.post("/bookings/cancel", json={"booking_ids": [booking_id]}).json()["seats_released"] == 2
+    assert client.post("/bookings/cancel", json={"booking_ids": [booking_id]}).json() == {
+        "cancelled": [], "seats_released": 0}
+    book(client, schedule_id, [1])
+    assert available_seats(client, schedule_id) == [2, 3, 4]
+
+def test_cancel_needs_a_target(client):
+    assert client.post("/bookings/cancel", json={}).status_code == 400
+
+def test_cancelled_booking_cannot_be_reinstated(client):
+    schedule_id = create_schedule(client, seats=4)
+    booking_id = book(client, schedule_id, [1]).json()["id"]
+    assert client.delete(f"/bookings/{booking_id}").status_code == 200
+    book(client, schedule_id, [1])
+    r = client.put(f"/bookings/{booking_id}?status=CONFIRMED")
+    assert r.status_code == 400
+    assert client.get(f"/bookings/{booking_id}").json()["booking_status"] == "CANCELLED"
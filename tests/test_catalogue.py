@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+from app.catalogue import catalogue
+from tests.helpers import create_schedule
+
+BUS = {"bus_number": "B-1", "operator_name": "op", "bus_type": "AC",
+       "source_stop": "A", "destination_stop": "B", "total_seats": 10}
+
+def test_bus_reads_are_served_from_memory(client, count_queries):
+    bus_id = client.post("/buses/", json=BUS).json()["id"]
+    client.get(f"/buses/{bus_id}")
+    with count_queries() as statements:
+        assert client.get(f"/buses/{bus_id}").json()["bus_number"] == "B-1"
+    assert statements == []
+    assert catalogue.stats()["hits"] >= 1
+
+def test_updating_a_bus_drops_the_cached_record(client):
+    bus_id = client.post("/buses/", json=BUS).json()["id"]
+    client.get(f"/buses/{bus_id}")
+    client.put(f"/buses/{bus_id}", json={**BUS, "operator_name": "new"})
+    assert client.get(f"/buses/{bus_id}").json()["operator_name"] == "new"
+
+def test_deleted_bus_is_not_served_from_memory(client):
+    bus_id = client.post("/buses/", json=BUS).json()["id"]
+    client.get(f"/buses/{bus_id}")
+    client.delete(f"/buses/{bus_id}")
+    assert client.get(f"/buses/{bus_id}").status_code == 404
+
+def test_updating_a_schedule_drops_the_cached_record(client, db):
+    schedule_id = create_schedule(client, generate=False)
+    assert catalogue.schedule(db, schedule_id).fare == 100
+    schedule = client.get(f"/schedules/{schedule_id}").json()
+    body = {k: schedule[k] for k in ("bus_id", "travel_date", "departure_time", "arrival_time")}
+    client.put(f"/schedules/{schedule_id}", json={**body, "fare": 60})
+    assert catalogue.schedule(db, schedule_id).fare == 60
+
+def test_load_keeps_only_the_upcoming_window(client, db):
+    today = date.today()
+    soon = create_schedule(client, generate=False, travel_date=str(today + timedelta(days=1)))
+    create_schedule(client, generate=False, travel_date=str(today + timedelta(days=30)))
+    catalogue.clear()
+    assert catalogue.load(db, days=7) == (2, 1)
+    assert list(catalogue._schedules) == [soon]
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app import crud_async, schemas
+from app.database import Base
+from tests.helpers import available_seats, create_schedule
+
+@pytest.fixture
+def engine(tmp_path):
+    # a file, so the sync client and the aiosqlite engine see the same database
+    engine = create_engine(f"sqlite:///{tmp_path / 'async.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def run_async(engine):
+    # runs fn(session) on a fresh AsyncSession and returns its result
+    def run(fn):
+        async def main():
+            async_engine = create_async_engine(engine.url.set(drivername="sqlite+aiosqlite"))
+            try:
+                async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+                    return await fn(db)
+            finally:
+                await async_engine.dispose()
+        return asyncio.run(main())
+    return run
+
+def _booking(schedule_id, seat_numbers):
+    return schemas.BookingCreate(passenger_name="p", passenger_phone="0", schedule_id=schedule_id,
+                                 seat_numbers=seat_numbers)
+
+def test_async_booking_matches_the_sync_api(client, run_async):
+    schedule_id = create_schedule(client, seats=4)
+    booking = run_async(lambda db: crud_async.create_booking(db, _booking(schedule_id, [1, 2])))
+    assert sorted(s.seat_number for s in booking.seats) == [1, 2]
+
+    synced = client.get(f"/bookings/{booking.id}").json()
+    assert synced["schedule_id"] == schedule_id
+    assert available_seats(client, schedule_id) == [3, 4]
+
+def test_async_booking_rejects_taken_seats(client, run_async):
+    schedule_id = create_schedule(client, seats=4)
+    run_async(lambda db: crud_async.create_booking(db, _booking(schedule_id, [1])))
+    with pytest.raises(ValueError):
+        run_async(lambda db: crud_async.create_booking(db, _booking(schedule_id, [1, 3])))
+    assert available_seats(client, schedule_id) == [2, 3, 4]
+
+def test_async_search_and_available_seats(client, run_async):
+    schedule_id = create_schedule(client, seats=3)
+
+    async def search(db):
+        results = await crud_async.get_schedules_by_route(db, "A", "B", "2030-01-01")
+        schedule = await crud_async.get_schedule(db, schedule_id)
+        return results, await crud_async.get_available_seats(db, schedule)
+    results, seats = run_async(search)
+    assert [r["id"] for r in results] == [schedule_id]
+    assert len(seats) == 3
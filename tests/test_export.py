@@ -0,0 +1,36 @@
+import csv
+import io
+import json
+from tests.helpers import book, create_schedule
+
+def test_ndjson_export_has_one_record_per_booking(client):
+    schedule_id = create_schedule(client, seats=4)
+    first = book(client, schedule_id, [1, 2]).json()["id"]
+    book(client, schedule_id, [3])
+    r = client.get("/bookings/export")
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in r.text.splitlines()]
+    assert [rec["id"] for rec in records] == [first, first + 1]
+    assert sorted(records[0]["seat_numbers"]) == [1, 2]
+
+def test_export_resumes_after_since(client):
+    schedule_id = create_schedule(client, seats=4)
+    first = book(client, schedule_id, [1]).json()["id"]
+    book(client, schedule_id, [2])
+    records = [json.loads(line) for line in client.get(f"/bookings/export?since={first}").text.splitlines()]
+    assert [rec["id"] for rec in records] == [first + 1]
+
+def test_csv_export_has_header_and_rows(client):
+    schedule_id = create_schedule(client, seats=4)
+    book(client, schedule_id, [1, 2])
+    r = client.get("/bookings/export?format=csv")
+    assert r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(rows) == 1
+    assert sorted(rows[0]["seat_numbers"].split()) == ["1", "2"]
+
+def test_empty_csv_export_still_has_a_header(client):
+    for url in ("/bookings/export?format=csv", "/payments/export?format=csv"):
+        r = client.get(url)
+        assert r.status_code == 200
+        assert r.text.splitlines()[0].startswith("id,")
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from app import crud, idempotency, models, schemas
+from tests.helpers import book, create_schedule
+
+def _key(value):
+    return {idempotency.IDEMPOTENCY_HEADER: value}
+
+def _book(client, schedule_id, seat_numbers, key):
+    body = {"passenger_name": "p", "passenger_phone": "0", "schedule_id": schedule_id, "seat_numbers": seat_numbers}
+    return client.post("/bookings/", json=body, headers=_key(key))
+
+def test_retry_replays_the_stored_booking(client, db):
+    schedule_id = create_schedule(client, seats=4)
+    first = _book(client, schedule_id, [1], "k1")
+    idempotency._lru.clear()  # the second lookup must come from the table
+    again = _book(client, schedule_id, [1], "k1")
+    assert again.status_code == 200
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert again.json() == first.json()
+    assert db.query(models.Booking).count() == 1
+
+def test_key_reused_with_another_request_is_rejected(client):
+    schedule_id = create_schedule(client, seats=4)
+    _book(client, schedule_id, [1], "k1")
+    assert _book(client, schedule_id, [2], "k1").status_code == 422
+
+def test_client_errors_are_replayed(client):
+    schedule_id = create_schedule(client, seats=4)
+    book(client, schedule_id, [1])
+    assert _book(client, schedule_id, [1], "k1").status_code == 400
+    replay = _book(client, schedule_id, [1], "k1")
+    assert replay.status_code == 400 and replay.headers["Idempotent-Replayed"] == "true"
+
+def test_retryable_conflict_is_not_stored(client, db, monkeypatch):
+    schedule_id = create_schedule(client, seats=4)
+    create_booking = crud.create_booking
+    def changed_once(db, booking_in):
+        monkeypatch.setattr(crud, "create_booking", create_booking)
+        raise crud.SeatsChanged()
+    monkeypatch.setattr(crud, "create_booking", changed_once)
+    assert _book(client, schedule_id, [1], "k1").status_code == 409
+    assert db.query(models.IdempotencyKey).count() == 0
+    retry = _book(client, schedule_id, [1], "k1")
+    assert retry.status_code == 200 and "Idempotent-Replayed" not in retry.headers
+
+def test_retryable_batch_conflict_is_not_stored(client, db, seat_map, monkeypatch):
+    schedule_id = create_schedule(client, seats=4)
+    swap_seat_map = crud._swap_seat_map
+    def changed_once(*args):
+        monkeypatch.setattr(crud, "_swap_seat_map", swap_seat_map)
+        raise crud.SeatsChanged()
+    monkeypatch.setattr(crud, "_swap_seat_map", changed_once)
+    body = {"legs": [{"passenger_name": "p", "passenger_phone": "0", "schedule_id": schedule_id, "seat_numbers": [1]}]}
+    assert client.post("/bookings/batch", json=body, headers=_key("k1")).status_code == 409
+    assert db.query(models.IdempotencyKey).count() == 0
+    retry = client.post("/bookings/batch", json=body, headers=_key("k1"))
+    assert retry.status_code == 200 and "Idempotent-Replayed" not in retry.headers
+
+def _reserve(db, key, expires_at, schedule_id):
+    # a request that reserved the key and has not finished (or died)
+    body = {"passenger_name": "p", "passenger_phone": "0", "schedule_id": schedule_id, "seat_numbers": [1]}
+    db.add(models.IdempotencyKey(scope="bookings", key=key, expires_at=expires_at,
+                                 request_hash=idempotency.request_hash(schemas.BookingCreate(**body))))
+    db.commit()
+
+def test_in_progress_key_answers_409(client, db):
+    schedule_id = create_schedule(client, seats=4)
+    _reserve(db, "k1", datetime.utcnow() + timedelta(seconds=30), schedule_id)
+    assert _book(client, schedule_id, [1], "k1").status_code == 409
+
+def test_expired_lease_is_taken_over(client, db):
+    schedule_id = create_schedule(client, seats=4)
+    _reserve(db, "k1", datetime.utcnow() - timedelta(seconds=1), schedule_id)
+    assert _book(client, schedule_id, [1], "k1").status_code == 200
+    db.expire_all()
+    row = db.query(models.IdempotencyKey).filter_by(key="k1").one()
+    assert row.response_status == 200
+    assert row.expires_at > datetime.utcnow() + timedelta(hours=1)
@@ -0,0 +1,49 @@
+from app import metrics
+from app.config import settings
+from tests.helpers import create_schedule
+
+def _sample(text, prefix):
+    # value of the first exposition line starting with prefix
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("h", "help", (1, 5))
+    for value in (0, 3, 9):
+        histogram.observe(("GET",), value)
+    lines = histogram.render(("method",))
+    assert 'h_bucket{method="GET",le="1"} 1' in lines
+    assert 'h_bucket{method="GET",le="5"} 2' in lines
+    assert 'h_bucket{method="GET",le="+Inf"} 3' in lines
+    assert 'h_sum{method="GET"} 12.0' in lines
+
+def test_requests_are_labelled_by_route_template(client):
+    schedule_id = create_schedule(client, generate=False)
+    series = 'http_requests_total{method="GET",route="/schedules/{schedule_id}",status="200"}'
+    before = _sample(client.get("/metrics").text, series)
+    client.get(f"/schedules/{schedule_id}")
+    client.get(f"/schedules/{schedule_id}")
+    text = client.get("/metrics").text
+    assert _sample(text, series) == before + 2
+    assert f"/schedules/{schedule_id}" not in text
+
+def test_sql_statements_are_counted_per_request(client, count_queries):
+    series = 'http_request_db_queries_sum{method="GET",route="/bookings/"}'
+    before = _sample(client.get("/metrics").text, series)
+    with count_queries() as statements:
+        client.get("/bookings/")
+    assert _sample(client.get("/metrics").text, series) == before + len(statements)
+
+def test_slow_queries_are_counted(client, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 1e-9)
+    series = 'db_slow_queries_total{route="/bookings/"}'
+    before = _sample(client.get("/metrics").text, series)
+    client.get("/bookings/")
+    assert _sample(client.get("/metrics").text, series) > before
+
+def test_pool_and_catalogue_gauges_are_exported(client):
+    text = client.get("/metrics").text
+    assert 'db_pool{stat="checkouts"}' in text
+    assert 'catalogue{stat="hits"}' in text
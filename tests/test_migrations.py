@@ -0,0 +1,89 @@
+import os
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+from app import crud, models
+from app.config import settings
+from app.database import Base
+from tests.helpers import book, create_schedule
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def migrate(tmp_path, monkeypatch):
+    # runs alembic against a scratch SQLite file and returns an engine on it
+    url = f"sqlite:///{tmp_path / 'migrate.db'}"
+    monkeypatch.setattr(settings, "DATABASE_URL", url)
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    config.attributes["configure_logger"] = False
+    engine = create_engine(url)
+
+    def run(step, revision):
+        step(config, revision)
+        return engine
+    yield run
+    engine.dispose()
+
+def _diff(engine):
+    with engine.connect() as conn:
+        return compare_metadata(MigrationContext.configure(conn, opts={"render_as_batch": True}), Base.metadata)
+
+def test_head_matches_the_models(migrate):
+    engine = migrate(command.upgrade, "head")
+    assert _diff(engine) == []
+
+def test_baseline_database_upgrades_to_the_models(migrate):
+    # what a database built by the original create_all goes through: stamp 0001, then upgrade
+    engine = migrate(command.upgrade, "0001")
+    assert "seat_holds" not in inspect(engine).get_table_names()
+    migrate(command.upgrade, "head")
+    assert _diff(engine) == []
+
+def test_every_revision_downgrades(migrate):
+    migrate(command.upgrade, "head")
+    engine = migrate(command.downgrade, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+
+def test_a_seat_is_only_actively_booked_once(client, db):
+    schedule_id = create_schedule(client, seats=2)
+    booking_id = book(client, schedule_id, [1]).json()["id"]
+    seat = db.query(models.BookingSeat).filter_by(booking_id=booking_id).one()
+    db.add(models.BookingSeat(booking_id=booking_id, seat_id=seat.seat_id, seat_number=1))
+    with pytest.raises(IntegrityError) as e:
+        db.flush()
+    assert crud.is_seat_taken(e.value)
+
+def test_other_integrity_errors_are_not_reported_as_taken_seats(client, engine):
+    with engine.connect() as conn:
+        conn.execute(text("PRAGMA foreign_keys=ON"))
+    schedule_id = create_schedule(client, seats=2)
+    with pytest.raises(IntegrityError):
+        book(client, schedule_id, [1], user_id=999)
+
+def test_sales_counters_are_backfilled_from_bookings(migrate):
+    # map inventory bookings have no seat rows, so only bookings.schedule_id ties a seat to its schedule
+    engine = migrate(command.upgrade, "0002")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO buses (id, bus_number, operator_name, bus_type, source_stop, destination_stop, total_seats) "
+            "VALUES (1, 'B-1', 'op', 'AC', 'A', 'B', 4)"))
+        conn.execute(text(
+            "INSERT INTO schedules (id, bus_id, travel_date, departure_time, arrival_time, fare, seat_map) VALUES "
+            "(1, 1, '2030-01-01', '10:00:00', '12:00:00', 10, '1110'), "
+            "(2, 1, '2030-01-02', '10:00:00', '12:00:00', 10, '0000')"))
+        conn.execute(text(
+            "INSERT INTO bookings (id, schedule_id, passenger_name, passenger_phone, total_fare, booking_status) "
+            "VALUES (1, 1, 'p', '0', 20, 'CONFIRMED'), (2, 1, 'p', '0', 10, 'CONFIRMED'), "
+            "(3, 1, 'p', '0', 10, 'CANCELLED')"))
+        conn.execute(text(
+            "INSERT INTO booking_seats (booking_id, seat_number, active) "
+            "VALUES (1, 1, 1), (1, 2, 1), (2, 3, 1), (3, 4, 0)"))
+    migrate(command.upgrade, "head")
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, seats_sold, revenue FROM schedules ORDER BY id")).all()
+    assert [tuple(r) for r in rows] == [(1, 3, 30), (2, 0, 0)]
@@ -0,0 +1,42 @@
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from tests.helpers import book, create_schedule
+
+def _pages(client, url):
+    ids, cursor = [], None
+    while True:
+        r = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert r.status_code == 200
+        ids += [row["id"] for row in r.json()]
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+
+def test_cursor_round_trips():
+    assert decode_cursor(encode_cursor(12345)) == 12345
+
+def test_cursor_walks_every_booking_once(client):
+    schedule_id = create_schedule(client, seats=7)
+    for seat in range(1, 8):
+        assert book(client, schedule_id, [seat]).status_code == 200
+    ids = _pages(client, "/bookings/?limit=3")
+    assert ids == sorted(ids) and len(ids) == 7
+
+def test_short_page_has_no_next_cursor(client):
+    for i in range(2):
+        client.post("/users/", json={"name": "u", "email": f"u{i}@example.com", "phone": "0"})
+    r = client.get("/users/?limit=5")
+    assert len(r.json()) == 2
+    assert NEXT_CURSOR_HEADER not in r.headers
+
+def test_filters_combine_with_the_cursor(client):
+    first = create_schedule(client, seats=4)
+    other = create_schedule(client, seats=4, source="X", destination="Y")
+    for seat in (1, 2, 3):
+        book(client, first, [seat])
+        book(client, other, [seat])
+    ids = _pages(client, f"/bookings/?limit=2&schedule_id={first}")
+    rows = [client.get(f"/bookings/{i}").json() for i in ids]
+    assert len(rows) == 3 and {r["schedule_id"] for r in rows} == {first}
+
+def test_bad_cursor_is_rejected(client):
+    assert client.get("/bookings/?cursor=!!notacursor").status_code == 400
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from app.config import settings
+from app.database import TimedQueuePool, build_engine, pool_stats
+
+def test_sqlite_file_engine_uses_pool_settings_and_wal(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    try:
+        assert isinstance(engine.pool, QueuePool)
+        assert engine.pool.size() == settings.DB_POOL_SIZE
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    finally:
+        engine.dispose()
+
+def test_in_memory_engine_keeps_the_default_pool():
+    engine = build_engine("sqlite://")
+    assert not isinstance(engine.pool, QueuePool)
+    engine.dispose()
+
+def test_timed_pool_records_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'timed.db'}", poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    checkouts, timeouts = pool_stats.checkouts, pool_stats.timeouts
+    try:
+        with engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+    finally:
+        engine.dispose()
+    assert pool_stats.checkouts == checkouts + 2
+    assert pool_stats.timeouts == timeouts + 1
+    assert pool_stats.wait_max >= 0.05
+
+def test_health_pool_reports_usage(client):
+    status = client.get("/health/pool").json()
+    assert {"pool", "checkouts", "timeouts", "wait_avg_ms", "wait_max_ms"} <= set(status)
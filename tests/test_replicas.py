@@ -0,0 +1,87 @@
+import time
+from datetime import date
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from starlette.requests import Request as StarletteRequest
+from app import crud, database
+from app.cache import search_cache
+from app.catalogue import catalogue
+from app.database import Base, Replica, get_db
+from app.read_your_writes import COOKIE_NAME, ReadYourWritesMiddleware
+from tests.helpers import create_schedule
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    replica = Replica(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(bind=replica.engine)
+    monkeypatch.setattr(database, "replicas", [replica])
+    yield replica
+    replica.engine.dispose()
+
+def _request(method, read_from_primary=False):
+    scope = {"type": "http", "method": method, "headers": [], "state": {}}
+    if read_from_primary:
+        scope["state"]["read_from_primary"] = True
+    return StarletteRequest(scope)
+
+def _bind(request):
+    sessions = get_db(request)
+    db = next(sessions)
+    try:
+        return db.get_bind(), db.info["replica"]
+    finally:
+        sessions.close()
+
+def test_reads_go_to_a_healthy_replica(replica):
+    assert _bind(_request("GET")) == (replica.engine, True)
+    assert _bind(_request("POST")) == (database.engine, False)
+    assert _bind(_request("GET", read_from_primary=True)) == (database.engine, False)
+
+def test_unhealthy_replica_falls_back_to_the_primary(replica):
+    replica.healthy = False
+    assert _bind(_request("GET")) == (database.engine, False)
+    replica.check()
+    assert replica.healthy and replica.lag == 0
+    assert _bind(_request("GET")) == (replica.engine, True)
+
+def test_unreachable_replica_is_taken_out_of_rotation(tmp_path):
+    replica = Replica(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    replica.check()
+    assert replica.status()["healthy"] is False
+    assert replica.status()["error"] == "OperationalError"
+
+def test_replica_reads_do_not_fill_process_caches(client, db):
+    schedule_id = create_schedule(client, seats=2, generate=False)
+    catalogue.clear()
+    search_cache.clear()
+    db.info["replica"] = True
+    assert len(crud.get_schedules_by_route(db, "A", "B", date(2030, 1, 1))) == 1
+    assert catalogue.schedule(db, schedule_id) is not None
+    assert search_cache._data == {} and catalogue.stats()["schedules"] == 0
+
+@pytest.fixture
+def pinned_app():
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.get("/read")
+    def read(request: Request):
+        return {"primary": getattr(request.state, "read_from_primary", False)}
+
+    @app.post("/write")
+    def write():
+        return {}
+    return TestClient(app)
+
+def test_a_write_pins_the_client_to_the_primary(pinned_app):
+    assert pinned_app.get("/read").json() == {"primary": False}
+    cookie = pinned_app.post("/write").headers["set-cookie"]
+    assert cookie.startswith(f"{COOKIE_NAME}=")
+    assert pinned_app.get("/read").json() == {"primary": True}
+
+def test_an_expired_pin_reads_from_replicas_again(pinned_app):
+    pinned_app.cookies.set(COOKIE_NAME, f"{time.time() - 1:.3f}")
+    assert pinned_app.get("/read").json() == {"primary": False}
+    pinned_app.cookies.set(COOKIE_NAME, "not-a-time")
+    assert pinned_app.get("/read").json() == {"primary": False}
@@ -0,0 +1,32 @@
+import pytest
+from pydantic import TypeAdapter
+from app import schemas
+from tests.helpers import book, create_schedule
+
+def _validated(model, body):
+    # what FastAPI would have sent had the route validated and encoded the content itself
+    adapter = TypeAdapter(list[model])
+    return adapter.dump_python(adapter.validate_python(body), mode="json")
+
+@pytest.fixture
+def schedule_id(client):
+    schedule_id = create_schedule(client, seats=3)
+    book(client, schedule_id, [2])
+    return schedule_id
+
+@pytest.mark.parametrize("url, model", [
+    ("/bookings/", schemas.BookingSummary),
+    ("/schedules/", schemas.ScheduleResponse),
+    ("/schedules/search?source=A&destination=B&travel_date=2030-01-01", schemas.ScheduleSearchResult),
+    ("/seats/available/{schedule_id}", schemas.SeatResponse),
+])
+def test_raw_json_lists_match_their_response_model(client, schedule_id, url, model):
+    r = client.get(url.format(schedule_id=schedule_id))
+    assert r.headers["content-type"] == "application/json"
+    body = r.json()
+    assert body
+    assert body == _validated(model, body)
+
+def test_schedule_list_row_matches_the_single_schedule(client, schedule_id):
+    [row] = client.get("/schedules/").json()
+    assert row == client.get(f"/schedules/{schedule_id}").json()
@@ -0,0 +1,23 @@
+from app.cache import search_cache
+from tests.helpers import book, create_schedule
+
+SEARCH = "/schedules/search?source=A&destination=B&travel_date=2030-01-01"
+
+def test_search_is_served_from_cache_until_a_booking(client, count_queries):
+    schedule_id = create_schedule(client, seats=4)
+    assert client.get(SEARCH).json()[0]["available_seats"] == 4
+
+    with count_queries() as statements:
+        assert client.get(SEARCH).json()[0]["available_seats"] == 4
+    assert statements == []
+
+    book(client, schedule_id, [1])
+    assert client.get(SEARCH).json()[0]["available_seats"] == 3
+
+def test_search_cache_is_keyed_by_route_and_date(client):
+    create_schedule(client, seats=4)
+    create_schedule(client, seats=4, travel_date="2030-01-02")
+    client.get(SEARCH)
+    client.get("/schedules/search?source=A&destination=B&travel_date=2030-01-02")
+    client.get("/schedules/search?source=B&destination=A&travel_date=2030-01-01")
+    assert len(search_cache._data) == 3
@@ -0,0 +1,39 @@
+from app import models
+
+def _bus(client, seats=4):
+    return client.post("/buses/", json={
+        "bus_number": "IMP", "operator_name": "op", "bus_type": "AC",
+        "source_stop": "A", "destination_stop": "B", "total_seats": seats,
+    }).json()["id"]
+
+def test_recurring_rule_expands_to_matching_weekdays(client, db):
+    bus_id = _bus(client)
+    # 2030-01-07 is a Monday; Mondays and Wednesdays over two weeks
+    rule = {"bus_id": bus_id, "days_of_week": [0, 2], "start_date": "2030-01-07", "end_date": "2030-01-20",
+            "departure_time": "08:00:00", "arrival_time": "10:00:00", "fare": 50}
+    r = client.post("/schedules/import", json={"rules": [rule], "generate_seats": True})
+    assert r.json() == {"created": 4, "errors": []}
+    dates = sorted(str(s.travel_date) for s in db.query(models.Schedule))
+    assert dates == ["2030-01-07", "2030-01-09", "2030-01-14", "2030-01-16"]
+    assert db.query(models.Seat).count() == 16
+
+def test_rule_errors_are_reported_per_rule(client):
+    bus_id = _bus(client)
+    good = {"bus_id": bus_id, "days_of_week": [0], "start_date": "2030-01-07", "end_date": "2030-01-07",
+            "departure_time": "08:00:00", "arrival_time": "10:00:00"}
+    rules = [good, dict(good, bus_id=999), dict(good, end_date="2030-01-01"), dict(good, days_of_week=[7])]
+    r = client.post("/schedules/import", json={"rules": rules}).json()
+    assert r["created"] == 1
+    assert [e["row"] for e in r["errors"]] == [2, 3, 4]
+    assert r["errors"][0]["error"] == "Bus 999 not found"
+
+def test_csv_import_reports_bad_lines(client, db):
+    bus_id = _bus(client)
+    csv = ("bus_id,travel_date,departure_time,arrival_time,fare\n"
+           f"{bus_id},2030-02-01,08:00:00,10:00:00,20\n"
+           f"{bus_id},not-a-date,08:00:00,10:00:00,20\n"
+           f"{bus_id},2030-02-02,08:00:00,10:00:00,20\n")
+    r = client.post("/schedules/import/csv", files={"file": ("t.csv", csv, "text/csv")}).json()
+    assert r["created"] == 2
+    assert [e["row"] for e in r["errors"]] == [3]
+    assert db.query(models.Schedule).count() == 2
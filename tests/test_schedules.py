@@ -0,0 +1,21 @@
+from tests.helpers import book, create_schedule
+
+def test_search_is_not_shadowed_by_schedule_id(client):
+    create_schedule(client, seats=4)
+    r = client.get("/schedules/search?source=A&destination=B&travel_date=2030-01-01")
+    assert r.status_code == 200
+    assert len(r.json()) == 1
+
+def test_search_returns_bus_and_availability(client):
+    schedule_id = create_schedule(client, seats=5, fare=40)
+    create_schedule(client, seats=5, source="X", destination="Y")
+    book(client, schedule_id, [1, 2])
+    [result] = client.get("/schedules/search?source=A&destination=B&travel_date=2030-01-01").json()
+    assert result["id"] == schedule_id
+    assert result["available_seats"] == 3
+    assert result["fare"] == 40
+    assert set(result["bus"]) == {"id", "bus_number", "operator_name", "bus_type"}
+
+def test_search_rejects_bad_dates(client):
+    r = client.get("/schedules/search?source=A&destination=B&travel_date=01-01-2030")
+    assert r.status_code == 400
@@ -0,0 +1,41 @@
+from tests.helpers import book, create_schedule
+
+def _seat_ids(client, schedule_id):
+    return {s["seat_number"]: s["id"] for s in client.get(f"/seats/available/{schedule_id}").json()}
+
+def test_seat_numbers_are_booked_within_the_schedule(client):
+    schedule_id = create_schedule(client, seats=4, fare=25)
+    create_schedule(client, seats=4, source="X", destination="Y")
+    r = book(client, schedule_id, [2, 4])
+    assert r.status_code == 200
+    assert r.json()["total_fare"] == 50
+    assert sorted(_seat_ids(client, schedule_id)) == [1, 3]
+
+def test_error_lists_only_the_unavailable_seats(client):
+    schedule_id = create_schedule(client, seats=4)
+    book(client, schedule_id, [2])
+    r = book(client, schedule_id, [1, 2, 9])
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Seats not available: 2, 9"
+    assert sorted(_seat_ids(client, schedule_id)) == [1, 3, 4]
+
+def test_seat_ids_still_work(client):
+    schedule_id = create_schedule(client, seats=4)
+    ids = _seat_ids(client, schedule_id)
+    r = book(client, schedule_id, [], seat_ids=[ids[3]])
+    assert r.status_code == 200
+    assert [s["seat_number"] for s in r.json()["seats"]] == [3]
+
+def test_seat_ids_from_another_schedule_are_rejected(client):
+    schedule_id = create_schedule(client, seats=4)
+    other = create_schedule(client, seats=4, source="X", destination="Y")
+    foreign = _seat_ids(client, other)[1]
+    r = book(client, schedule_id, [], seat_ids=[foreign])
+    assert r.status_code == 400
+    assert r.json()["detail"] == f"Seat ids not available: {foreign}"
+    assert len(_seat_ids(client, other)) == 4
+
+def test_duplicate_seats_are_rejected(client):
+    schedule_id = create_schedule(client, seats=4)
+    assert book(client, schedule_id, [1, 1]).status_code == 400
+    assert book(client, schedule_id, []).status_code == 400
@@ -0,0 +1,23 @@
+from app import models
+from tests.helpers import create_schedule
+
+def test_generate_is_idempotent(client, db):
+    schedule_id = create_schedule(client, seats=8, generate=False)
+    first = client.post(f"/seats/generate/{schedule_id}").json()
+    again = client.post(f"/seats/generate/{schedule_id}").json()
+    assert [s["seat_number"] for s in first] == list(range(1, 9))
+    assert [s["id"] for s in again] == [s["id"] for s in first]
+    assert db.query(models.Seat).filter_by(schedule_id=schedule_id).count() == 8
+
+def test_bulk_generate_by_date_range_skips_schedules_with_seats(client, db, count_queries):
+    ids = [create_schedule(client, seats=5, travel_date=f"2030-01-0{d}", generate=False) for d in (1, 2, 3)]
+    client.post(f"/seats/generate/{ids[0]}")
+
+    with count_queries() as statements:
+        r = client.post("/seats/generate", json={"from_date": "2030-01-01", "to_date": "2030-01-02"})
+    assert r.json() == {"schedule_ids": [ids[1]], "seats_created": 5}
+    assert len(statements) < 10  # set-based, not one INSERT per seat
+    assert db.query(models.Seat).filter_by(schedule_id=ids[2]).count() == 0
+
+def test_bulk_generate_needs_ids_or_dates(client):
+    assert client.post("/seats/generate", json={}).status_code == 400
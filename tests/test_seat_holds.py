@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+import pytest
+from app import crud, main, models
+from app.config import settings
+from tests.helpers import available_seats, book, create_schedule
+
+def _hold(client, schedule_id, seat_numbers, **extra):
+    return client.post("/seats/hold", json={"schedule_id": schedule_id, "seat_numbers": seat_numbers, **extra})
+
+def test_held_seats_cannot_be_booked_without_the_token(client, inventory):
+    schedule_id = create_schedule(client, seats=4)
+    hold = _hold(client, schedule_id, [1, 2]).json()
+    assert hold["status"] == "ACTIVE" and hold["seat_numbers"] == [1, 2]
+    assert available_seats(client, schedule_id) == [3, 4]
+    r = book(client, schedule_id, [1])
+    assert r.status_code == 400
+
+def test_hold_token_converts_into_a_booking(client, inventory):
+    schedule_id = create_schedule(client, seats=4)
+    token = _hold(client, schedule_id, [1, 2]).json()["token"]
+    r = book(client, schedule_id, [], hold_token=token)
+    assert r.status_code == 200
+    assert sorted(s["seat_number"] for s in r.json()["seats"]) == [1, 2]
+    assert book(client, schedule_id, [], hold_token=token).status_code == 400
+
+def test_released_hold_frees_its_seats(client, inventory):
+    schedule_id = create_schedule(client, seats=4)
+    token = _hold(client, schedule_id, [3]).json()["token"]
+    assert client.delete(f"/seats/hold/{token}").status_code == 200
+    assert available_seats(client, schedule_id) == [1, 2, 3, 4]
+    assert client.delete(f"/seats/hold/{token}").status_code == 400
+
+def test_expired_holds_are_released(client, db, inventory):
+    schedule_id = create_schedule(client, seats=4)
+    token = _hold(client, schedule_id, [1, 4]).json()["token"]
+    db.query(models.SeatHold).filter_by(token=token).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    assert crud.release_expired_holds(db) == 1
+    assert available_seats(client, schedule_id) == [1, 2, 3, 4]
+    assert book(client, schedule_id, [], hold_token=token).status_code == 400
+
+@pytest.mark.parametrize("minutes", [0, -1, settings.SEAT_HOLD_MINUTES + 1])
+def test_hold_minutes_are_bounded_by_the_ttl(client, minutes):
+    schedule_id = create_schedule(client, seats=4)
+    assert _hold(client, schedule_id, [1], minutes=minutes).status_code == 400
+    assert available_seats(client, schedule_id) == [1, 2, 3, 4]
+
+def test_shorter_hold_is_allowed(client):
+    schedule_id = create_schedule(client, seats=4)
+    hold = _hold(client, schedule_id, [1], minutes=1).json()
+    expires_at = datetime.fromisoformat(hold["expires_at"]).replace(tzinfo=None)
+    assert expires_at <= datetime.utcnow() + timedelta(minutes=1)
+
+def test_a_failing_departure_does_not_block_other_expired_holds(client, db, seat_map, monkeypatch):
+    contended = create_schedule(client, seats=4)
+    quiet = create_schedule(client, seats=4, source="X", destination="Y")
+    tokens = [_hold(client, s, [1]).json()["token"] for s in (contended, quiet)]
+    db.query(models.SeatHold).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    swap_seat_map = crud._swap_seat_map
+    def contend(db, schedule, *args):
+        if schedule.id == contended:
+            raise crud.SeatsChanged()
+        return swap_seat_map(db, schedule, *args)
+    monkeypatch.setattr(crud, "_swap_seat_map", contend)
+
+    assert crud.release_expired_holds(db) == 1
+    db.expire_all()
+    statuses = {h.token: h.status for h in db.query(models.SeatHold)}
+    assert statuses == {tokens[0]: "ACTIVE", tokens[1]: "EXPIRED"}
+    assert db.get(models.Schedule, quiet).seat_map == "0000"
+
+    monkeypatch.setattr(crud, "_swap_seat_map", swap_seat_map)
+    assert crud.release_expired_holds(db) == 1
+    assert available_seats(client, contended) == [1, 2, 3, 4]
+
+def test_sweep_tasks_run_independently(session_factory, monkeypatch):
+    ran = []
+    def broken(db):
+        raise ValueError("inconsistent seat map")
+    monkeypatch.setattr(main, "SessionLocal", session_factory)
+    monkeypatch.setattr(main, "SWEEP_TASKS", (("broken", broken), ("next", lambda db: ran.append(db) or 2)))
+    assert main._sweep_once() == [0, 2]
+    assert len(ran) == 1
@@ -0,0 +1,28 @@
+from app import models
+from tests.helpers import available_seats, book, create_schedule
+
+def test_generate_keeps_one_map_and_no_seat_rows(client, db, seat_map):
+    schedule_id = create_schedule(client, seats=6)
+    schedule = db.get(models.Schedule, schedule_id)
+    assert schedule.seat_map == "000000"
+    assert db.query(models.Seat).filter_by(schedule_id=schedule_id).count() == 0
+
+def test_booking_marks_the_map_and_rejects_taken_seats(client, db, seat_map):
+    schedule_id = create_schedule(client, seats=6)
+    r = book(client, schedule_id, [2, 5])
+    assert r.status_code == 200
+    assert [s["seat_id"] for s in r.json()["seats"]] == [None, None]
+    assert db.get(models.Schedule, schedule_id).seat_map == "010010"
+
+    assert available_seats(client, schedule_id) == [1, 3, 4, 6]
+
+    assert book(client, schedule_id, [5]).status_code == 400
+    assert book(client, schedule_id, [7]).status_code == 400
+
+def test_cancel_frees_map_seats(client, db, seat_map):
+    schedule_id = create_schedule(client, seats=4)
+    booking_id = book(client, schedule_id, [1, 2]).json()["id"]
+    assert client.delete(f"/bookings/{booking_id}").status_code == 200
+    db.expire_all()
+    assert db.get(models.Schedule, schedule_id).seat_map == "0000"
+    assert book(client, schedule_id, [1]).status_code == 200
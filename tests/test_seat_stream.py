@@ -0,0 +1,62 @@
+import asyncio
+from sqlalchemy import text
+from app import seat_stream
+from app.seat_stream import Broadcaster, broadcaster
+from tests.helpers import book, create_schedule
+
+def test_publish_reaches_only_subscribers_of_that_schedule():
+    async def main():
+        hub = Broadcaster()
+        mine, other = hub.subscribe(1), hub.subscribe(2)
+        await asyncio.to_thread(hub.publish, {"type": "delta", "schedule_id": 1})
+        message = await asyncio.wait_for(mine.get(), 1)
+        hub.unsubscribe(1, mine)
+        hub.unsubscribe(2, other)
+        return message, other.empty(), hub.subscriber_count()
+    assert asyncio.run(main()) == ({"type": "delta", "schedule_id": 1}, True, 0)
+
+def test_slow_subscriber_is_told_to_resync(monkeypatch):
+    monkeypatch.setattr(seat_stream, "QUEUE_SIZE", 2)
+    async def main():
+        hub = Broadcaster()
+        queue = hub.subscribe(1)
+        for i in range(3):
+            hub.publish({"type": "delta", "schedule_id": 1, "n": i})
+        await asyncio.sleep(0)
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+    assert asyncio.run(main()) == [{"type": "resync", "schedule_id": 1}]
+
+def test_changes_from_one_transaction_become_one_delta():
+    assert seat_stream._messages([(1, [3, 4], False), (1, [4], True), (2, [1], False)]) == [
+        {"type": "delta", "schedule_id": 1, "seats": [{"seat_number": 3, "is_available": False},
+                                                      {"seat_number": 4, "is_available": True}]},
+        {"type": "delta", "schedule_id": 2, "seats": [{"seat_number": 1, "is_available": False}]},
+    ]
+
+def test_deltas_are_published_on_commit_only(db):
+    async def main():
+        queue = broadcaster.subscribe(7)
+        try:
+            db.execute(text("SELECT 1"))  # rollback only fires inside a transaction
+            seat_stream.stage(db, 7, [1], False)
+            db.rollback()
+            seat_stream.stage(db, 7, [2], False)
+            db.commit()
+            return await asyncio.wait_for(queue.get(), 1), queue.empty()
+        finally:
+            broadcaster.unsubscribe(7, queue)
+    message, drained = asyncio.run(main())
+    assert message["seats"] == [{"seat_number": 2, "is_available": False}]
+    assert drained
+
+def test_booking_publishes_the_seats_it_took(client):
+    schedule_id = create_schedule(client, seats=4)
+    async def main():
+        queue = broadcaster.subscribe(schedule_id)
+        try:
+            await asyncio.to_thread(book, client, schedule_id, [1, 3])
+            return await asyncio.wait_for(queue.get(), 1)
+        finally:
+            broadcaster.unsubscribe(schedule_id, queue)
+    message = asyncio.run(main())
+    assert [s["seat_number"] for s in message["seats"] if not s["is_available"]] == [1, 3]
@@ -0,0 +1,48 @@
+import pytest
+from app import tickets
+from app.config import settings
+from tests.helpers import book, create_schedule
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def test_payload_is_signed():
+    ticket = tickets.payload(12, 3)
+    assert tickets.parse(ticket) == (12, 3)
+    for forged in (ticket.replace(".12.", ".13."), ticket[:-2] + "AA", "LT1.12.3", "garbage"):
+        with pytest.raises(ValueError):
+            tickets.parse(forged)
+
+def test_booking_carries_the_payload_but_lists_do_not(client):
+    schedule_id = create_schedule(client, seats=2)
+    booking = book(client, schedule_id, [1]).json()
+    assert booking["qr_code"] == tickets.payload(booking["id"], schedule_id)
+    assert "qr_code" not in client.get("/bookings/").json()[0]
+
+def test_ticket_png_is_rendered_once_and_revalidated(client, monkeypatch):
+    schedule_id = create_schedule(client, seats=2)
+    booking_id = book(client, schedule_id, [1]).json()["id"]
+    rendered = []
+    render_png = tickets.render_png
+    monkeypatch.setattr(tickets, "render_png", lambda t: rendered.append(t) or render_png(t))
+
+    first = client.get(f"/bookings/{booking_id}/ticket.png")
+    assert first.headers["content-type"] == "image/png"
+    assert first.content.startswith(PNG_SIGNATURE)
+    assert client.get(f"/bookings/{booking_id}/ticket.png").content == first.content
+    assert len(rendered) == 1
+
+    etag = first.headers["ETag"]
+    revalidated = client.get(f"/bookings/{booking_id}/ticket.png", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert revalidated.headers["ETag"] == etag
+
+def test_disk_cache_is_shared_between_workers(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "TICKET_CACHE_DIR", str(tmp_path))
+    tickets._lru.clear()
+    png = tickets.ticket_png(tickets.payload(1, 1))
+    tickets._lru.clear()  # as another worker would start
+    monkeypatch.setattr(tickets, "render_png", lambda t: pytest.fail("rendered again"))
+    assert tickets.ticket_png(tickets.payload(1, 1)) == png
+
+def test_unknown_booking_has_no_ticket(client):
+    assert client.get("/bookings/999/ticket.png").status_code == 404